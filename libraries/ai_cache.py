@@ -0,0 +1,88 @@
+# libraries/ai_cache.py
+# Disk-backed response cache for the AI panels. No Streamlit in here: one JSON file per
+# cache, LRU-trimmed to max_entries, entries older than ttl are dropped on read.
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AI_CACHE_DIR = os.environ.get("SMFC_AI_CACHE", os.path.join(ROOT_DIR, "data", "ai_cache"))
+
+def normalize_question(text):
+    # "  Who played WELL??" and "who played well" are the same question
+    text = re.sub(r'\s+', ' ', str(text or '')).strip().lower()
+    return re.sub(r'[\s?!.]+$', '', text)
+
+def frame_fingerprint(*frames):
+    # Content hash of the DataFrames a prompt is built from (index included)
+    h = hashlib.sha1()
+    for df in frames:
+        if df is None or df.empty:
+            h.update(b"<empty>")
+            continue
+        # Lists (e.g. leaderboard 'Form') aren't hashable by pandas; their text form is
+        flat = df.apply(lambda col: col.map(str) if col.dtype == object else col)
+        h.update(pd.util.hash_pandas_object(flat, index=True).to_numpy().tobytes())
+        h.update("|".join(map(str, df.columns)).encode())
+    return h.hexdigest()
+
+def cache_key(*parts):
+    return hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+class ResponseCache:
+    def __init__(self, name, max_entries=200, ttl=6 * 3600, folder=None):
+        self.path = os.path.join(folder or AI_CACHE_DIR, f"{name}.json")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        # key -> {"value", "created", "used"}; read lazily, once per process
+        if self.entries is None:
+            try:
+                with open(self.path) as f: self.entries = json.load(f)
+            except (OSError, ValueError): self.entries = {}
+        return self.entries
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f: json.dump(self.entries, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.load().get(key)
+            if entry is None or time.time() - entry["created"] > self.ttl:
+                if entry is not None: del self.entries[key]
+                self.misses += 1
+                return None
+            entry["used"] = time.time()
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, key, value):
+        with self.lock:
+            now = time.time()
+            entries = self.load()
+            entries[key] = {"value": value, "created": now, "used": now}
+            expired = [k for k, e in entries.items() if now - e["created"] > self.ttl]
+            for k in expired: del entries[k]
+            # Least recently used go first once we're over the cap
+            for k in sorted(entries, key=lambda k: entries[k]["used"])[:max(0, len(entries) - self.max_entries)]:
+                del entries[k]
+            try: self.save()
+            except OSError as e: print(f"AI Cache Error: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            try: self.save()
+            except OSError as e: print(f"AI Cache Error: {e}")
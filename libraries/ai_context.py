@@ -0,0 +1,114 @@
+# libraries/ai_context.py
+# Builds the data block of the Kaarthumbi prompt under a token budget instead of pasting the
+# whole leaderboard. Most relevant first: players named in the question, their recent
+# matches, the top and bottom of the table, then the latest results, until the budget is hit.
+#   python -m libraries.ai_context --players 300 --matches 400   (size / build-time comparison)
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+try:
+    from libraries.ai_metrics import estimate_tokens
+except ImportError:
+    from ai_metrics import estimate_tokens
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("SMFC_AI_CONTEXT_TOKENS", 400))
+TOP_N, BOTTOM_N, RECENT_MATCHES = 5, 3, 5
+
+def mentioned_players(question, names):
+    # Roster names found in the question, on word boundaries. Full names first; whatever is
+    # left of the question can still name someone by a part of 3+ letters, but only a part
+    # that belongs to one player ("what about gilson?" -> "Gilson Varghese"; "joseph" alone
+    # names nobody when three Josephs play)
+    q = str(question or '').lower()
+    names = [str(n) for n in names]
+    found = []
+    for name in names:
+        pattern = rf'\b{re.escape(name.lower())}\b'
+        if re.search(pattern, q):
+            found.append(name)
+            q = re.sub(pattern, ' ', q)
+    parts = {n: {p for p in re.split(r'\W+', n.lower()) if len(p) >= 3} for n in names if n not in found}
+    owners = {}
+    for n, ps in parts.items():
+        for p in ps: owners.setdefault(p, []).append(n)
+    for name, ps in parts.items():
+        if any(len(owners[p]) == 1 and re.search(rf'\b{re.escape(p)}\b', q) for p in ps): found.append(name)
+    return found
+
+def player_line(name, row):
+    return f"{name}: #{row['Rank']} M{row['M']} W{row['W']} L{row['L']} D{row['D']} {row['Win %']}% form {''.join(row['Form'][-5:])}"
+
+def team_names(team):
+    # "Alan Joseph, Gilson Varghese" -> {"Alan Joseph", "Gilson Varghese"}; exact names, never substrings
+    return {n.strip() for n in str(team).split(',') if n.strip()}
+
+def match_line(row, players=()):
+    # `players` (the ones asked about) are tagged with the side they played on, so win/loss is readable
+    line = f"{row['Date']}: Blue {row['Score_Blue']}-{row['Score_Red']} Red (Winner: {row['Winner']})"
+    blue, red = team_names(row['Team_Blue']), team_names(row['Team_Red'])
+    sides = [f"{p} on {'Blue' if p in blue else 'Red'}" for p in map(str, players) if p in blue or p in red]
+    return line + (f" [{', '.join(sides)}]" if sides else "")
+
+def build_context(question, leaderboard_df, history_df, budget=CONTEXT_TOKEN_BUDGET):
+    # -> (context text, stats) where stats has tokens / players / matches / mentioned
+    sections = []
+    lb = leaderboard_df if leaderboard_df is not None else pd.DataFrame()
+    hist = history_df.sort_values('Date', ascending=False) if history_df is not None and not history_df.empty else pd.DataFrame()
+    mentioned = mentioned_players(question, lb.index) if not lb.empty else []
+
+    # Each row is (kind, key, line); a player or match already given earlier is not repeated
+    if mentioned:
+        sections.append(("ASKED ABOUT", [("player", n, player_line(n, lb.loc[n])) for n in mentioned]))
+        if not hist.empty:
+            asked = set(map(str, mentioned))
+            played = [(i, r) for i, r in hist.iterrows() if asked & (team_names(r['Team_Blue']) | team_names(r['Team_Red']))]
+            sections.append(("THEIR RECENT MATCHES", [("match", i, match_line(r, mentioned)) for i, r in played[:RECENT_MATCHES]]))
+    if not lb.empty:
+        sections.append(("TOP OF THE TABLE", [("player", n, player_line(n, r)) for n, r in lb.head(TOP_N).iterrows()]))
+        sections.append(("BOTTOM OF THE TABLE", [("player", n, player_line(n, r)) for n, r in lb.tail(BOTTOM_N).iterrows()]))
+    if not hist.empty:
+        sections.append(("LATEST RESULTS", [("match", i, match_line(r, mentioned)) for i, r in hist.head(RECENT_MATCHES).iterrows()]))
+
+    lines, used, counts, seen = [], 0, {"player": 0, "match": 0}, set()
+    for title, rows in sections:
+        rows = [(kind, key, line) for kind, key, line in rows if (kind, key) not in seen]
+        for i, (kind, key, row) in enumerate(rows):
+            add = ([f"[{title}]"] if i == 0 else []) + [row]
+            cost = sum(estimate_tokens(x) + 1 for x in add)
+            if used + cost > budget: break
+            lines += add
+            used += cost
+            counts[kind] += 1
+            seen.add((kind, key))
+    text = "\n".join(lines) if lines else "No Stats Available"
+    return text, {"tokens": estimate_tokens(text), "players": counts["player"], "matches": counts["match"], "mentioned": mentioned}
+
+if __name__ == "__main__":
+    import random
+    parser = argparse.ArgumentParser(description="Compare the budgeted scout context with the full leaderboard dump.")
+    parser.add_argument("--players", type=int, default=60)
+    parser.add_argument("--matches", type=int, default=120)
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    names = [f"Player{i:03d}" for i in range(args.players)]
+    hist = pd.DataFrame([{
+        "Date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "Score_Blue": rng.randint(0, 5), "Score_Red": rng.randint(0, 5),
+        "Winner": rng.choice(["Blue", "Red", "Draw"]), "Team_Blue": ", ".join(rng.sample(names, 7)), "Team_Red": ", ".join(rng.sample(names, 7)),
+    } for i in range(args.matches)])
+    try: from libraries.backend import calculate_leaderboard
+    except ImportError: from backend import calculate_leaderboard
+    lb = calculate_leaderboard(hist, set(names))
+    question = f"How is {names[3]} doing compared to {names[7]}?"
+    start = time.perf_counter()
+    full = lb.to_string(index=True)
+    full_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    text, stats = build_context(question, lb, hist, args.budget)
+    built_ms = (time.perf_counter() - start) * 1000
+    print(f"full leaderboard: {estimate_tokens(full)} tokens in {full_ms:.1f} ms | budgeted: {stats['tokens']} tokens in {built_ms:.1f} ms "
+          f"({stats['players']} players, {stats['matches']} matches, mentioned {stats['mentioned']})")
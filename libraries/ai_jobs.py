@@ -0,0 +1,125 @@
+# libraries/ai_jobs.py
+# Background runner for the AI panels. Model calls run on a small shared pool instead of the
+# Streamlit script thread: the page submits a job, keeps reacting to clicks, and polls the
+# job's text as it streams in. No Streamlit in here.
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+AI_MAX_IN_FLIGHT = int(os.environ.get("SMFC_AI_MAX_IN_FLIGHT", 4))
+AI_MAX_QUEUED = 16
+AI_DEADLINE = 45
+# A job nobody has polled for this long belongs to a closed tab / another page: stop it
+AI_ABANDON_AFTER = 10
+
+class AIJob:
+    # status: queued -> running -> done | timeout | cancelled | busy | error
+    FINAL = ("done", "timeout", "cancelled", "busy", "error")
+
+    def __init__(self, deadline=AI_DEADLINE, abandon_after=AI_ABANDON_AFTER):
+        self.chunks = []
+        self.status = "queued"
+        self.error = None
+        self.created = time.time()
+        self.deadline = self.created + deadline
+        self.abandon_after = abandon_after
+        self.seen = self.created
+        self.stop = threading.Event()
+        self.future = None
+        # Status changes from the worker and from the page (cancel / poll) go through this
+        self.lock = threading.Lock()
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+    def done(self):
+        return self.status in self.FINAL
+
+    def finish(self, status, error=None):
+        with self.lock:
+            if not self.done(): self.status, self.error = status, error
+
+    def start(self):
+        # queued -> running, unless a cancel / timeout got there first
+        with self.lock:
+            if self.status != "queued": return False
+            self.status = "running"
+            return True
+
+    def poll(self):
+        # Called by whoever is displaying the job; doubles as the "still wanted" heartbeat
+        self.seen = time.time()
+        if not self.done() and self.seen > self.deadline:
+            self.finish("timeout")
+            self.stop.set()
+        return self.status
+
+    def should_stop(self):
+        now = time.time()
+        if self.stop.is_set(): return True
+        if now > self.deadline: self.finish("timeout")
+        elif now - self.seen > self.abandon_after: self.finish("cancelled", "abandoned")
+        else: return False
+        return True
+
+    def cancel(self):
+        self.stop.set()
+        if self.future is not None: self.future.cancel()
+        self.finish("cancelled")
+
+class AIRunner:
+    # At most max_in_flight model calls at once across every session; up to max_queued more
+    # wait their turn, anything beyond that is turned away as "busy" instead of piling up.
+    def __init__(self, max_in_flight=AI_MAX_IN_FLIGHT, max_queued=AI_MAX_QUEUED):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ai")
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def submit(self, stream_fn, *args, deadline=AI_DEADLINE, abandon_after=AI_ABANDON_AFTER):
+        # stream_fn(*args) must yield text chunks (see ai_scout.stream_*)
+        job = AIJob(deadline, abandon_after)
+        with self.lock:
+            if self.pending >= self.max_in_flight + self.max_queued:
+                job.finish("busy")
+                return job
+            self.pending += 1
+        job.future = self.pool.submit(self.run, job, stream_fn, args)
+        # Fires for finished and for cancelled-while-queued jobs alike
+        job.future.add_done_callback(self.release)
+        return job
+
+    def release(self, future):
+        with self.lock: self.pending -= 1
+
+    def run(self, job, stream_fn, args):
+        if job.should_stop() or not job.start(): return
+        chunks = None
+        try:
+            # Inside the try: a stream_fn that raises when called (not a generator) still ends the job
+            chunks = iter(stream_fn(*args))
+            for chunk in chunks:
+                # Checked between chunks, so a cancelled or late job stops reading the stream
+                if job.should_stop(): return
+                job.chunks.append(chunk)
+            job.finish("done")
+        except Exception as e:
+            job.finish("error", str(e))
+        finally:
+            if hasattr(chunks, "close"): chunks.close()
+
+    def stats(self):
+        with self.lock: pending = self.pending
+        return {"in_flight": min(pending, self.max_in_flight), "queued": max(0, pending - self.max_in_flight)}
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None: _runner = AIRunner()
+    return _runner
@@ -0,0 +1,110 @@
+# libraries/ai_metrics.py
+# One JSON line per AI call (feature, session, provider, token counts, latency, cache hit,
+# error) in a rolling local file, plus the per-feature / per-session rollups the admin tab
+# shows. Token counts are estimates (~4 chars per token); no Streamlit in here.
+#   python -m libraries.ai_metrics --hours 24 --by session
+import argparse
+import json
+import math
+import os
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_PATH = os.environ.get("SMFC_AI_METRICS", os.path.join(ROOT_DIR, "data", "ai_metrics.jsonl"))
+METRICS_MAX_BYTES = int(os.environ.get("SMFC_AI_METRICS_BYTES", 2_000_000))
+METRICS_KEEP = 3 # rotated files: ai_metrics.jsonl.1 (newest) .. .3 (oldest)
+# USD per million tokens (prompt, response); 0 = free tier, set these for a paid key
+COST_PER_M = (float(os.environ.get("SMFC_AI_COST_IN", 0)), float(os.environ.get("SMFC_AI_COST_OUT", 0)))
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting English-ish prompts
+    return math.ceil(len(text) / 4)
+
+class MetricsLog:
+    def __init__(self, path=METRICS_PATH, max_bytes=METRICS_MAX_BYTES, keep=METRICS_KEEP):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.lock = threading.Lock()
+
+    def rotate(self):
+        for n in range(self.keep - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"): os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def record(self, row):
+        with self.lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes: self.rotate()
+                with open(self.path, "a") as f: f.write(json.dumps(row) + "\n")
+            except OSError as e: print(f"AI Metrics Error: {e}")
+
+    def read(self, since=None):
+        # Oldest file first, so rows come back in time order
+        rows = []
+        for path in [f"{self.path}.{n}" for n in range(self.keep, 0, -1)] + [self.path]:
+            try:
+                with open(path) as f:
+                    for line in f:
+                        try: row = json.loads(line)
+                        except ValueError: continue # a line cut short by a crash
+                        if since is None or row.get("at", 0) >= since: rows.append(row)
+            except OSError: pass
+        return rows
+
+METRICS = MetricsLog()
+
+def record_call(feature, session=None, provider=None, prompt="", response="", first_chunk_s=None,
+                model_s=0.0, total_s=0.0, cache_hit=False, error=None, log=None):
+    # Cache hits send no prompt, so they cost nothing but still count towards the feature
+    prompt_tokens = 0 if cache_hit else estimate_tokens(prompt)
+    response_tokens = estimate_tokens(response)
+    cost = 0.0 if cache_hit else (prompt_tokens * COST_PER_M[0] + response_tokens * COST_PER_M[1]) / 1e6
+    (log or METRICS).record({
+        "at": round(time.time(), 3), "feature": feature, "session": session or "-", "provider": provider,
+        "prompt_tokens": prompt_tokens, "response_tokens": response_tokens, "cost_usd": round(cost, 6),
+        "first_chunk_s": None if first_chunk_s is None else round(first_chunk_s, 3),
+        "model_s": round(model_s, 3), "total_s": round(total_s, 3), "cache_hit": cache_hit, "error": error,
+    })
+
+def pct(values, q):
+    values = sorted(v for v in values if v is not None)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3) if values else None
+
+def summarize(rows, by="feature"):
+    # -> one dict per feature (or session / provider), busiest first. Latency percentiles
+    # only count real model calls; cache hits would flatter them.
+    groups = {}
+    for row in rows: groups.setdefault(row.get(by) or "-", []).append(row)
+    out = []
+    for key, group in groups.items():
+        calls = [r for r in group if not r.get("cache_hit")]
+        hits = len(group) - len(calls)
+        out.append({
+            by: key, "requests": len(group), "cache_hits": hits, "hit_rate_%": round(100 * hits / len(group), 1),
+            "errors": sum(1 for r in group if r.get("error")),
+            "first_chunk_p50_s": pct([r.get("first_chunk_s") for r in calls], 0.5),
+            "total_p50_s": pct([r.get("total_s") for r in calls], 0.5), "total_p95_s": pct([r.get("total_s") for r in calls], 0.95),
+            "overhead_p50_s": pct([r.get("total_s", 0) - r.get("model_s", 0) for r in calls], 0.5),
+            "avg_prompt_tokens": round(sum(r.get("prompt_tokens", 0) for r in calls) / len(calls)) if calls else 0,
+            "avg_response_tokens": round(sum(r.get("response_tokens", 0) for r in calls) / len(calls)) if calls else 0,
+            "tokens": sum(r.get("prompt_tokens", 0) + r.get("response_tokens", 0) for r in group),
+            "cost_usd": round(sum(r.get("cost_usd", 0) for r in group), 4),
+        })
+    return sorted(out, key=lambda r: r["requests"], reverse=True)
+
+def recent_errors(rows, n=10):
+    return [r for r in rows if r.get("error")][-n:][::-1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise the AI call metrics log.")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--by", default="feature", choices=["feature", "session", "provider"])
+    parser.add_argument("--path", default=METRICS_PATH)
+    args = parser.parse_args()
+    rows = MetricsLog(args.path).read(since=time.time() - args.hours * 3600)
+    print(f"{len(rows)} AI requests in the last {args.hours:g}h ({args.path})")
+    for row in summarize(rows, args.by): print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+    for row in recent_errors(rows, 5): print(f"  ! {time.strftime('%Y-%m-%d %H:%M', time.localtime(row['at']))} {row['feature']}: {row['error']}")
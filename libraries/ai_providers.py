@@ -0,0 +1,314 @@
+# libraries/ai_providers.py
+# Anything with stream(prompt, feature) -> iterator of text chunks, plus a `name`.
+# ai_scout only talks to get_llm(), so offline runs, tests and load tests can swap in
+# LocalLLM (SMFC_LLM_PROVIDER=local) or ReplayLLM (=replay) without an API key or network.
+# No Streamlit in here.
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+try:
+    from libraries.ai_metrics import pct, record_call
+except ImportError:
+    from ai_metrics import pct, record_call
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPLAY_PATH = os.environ.get("SMFC_LLM_REPLAY", os.path.join(ROOT_DIR, "data", "ai_replay.jsonl"))
+GEMINI_MODEL = "gemini-2.0-flash"
+REQUEST_TIMEOUT = 40 # seconds; keeps a hung call from pinning an ai_jobs worker forever
+AI_RATE_PER_MIN = float(os.environ.get("SMFC_AI_RATE_PER_MIN", 30))
+AI_BURST = int(os.environ.get("SMFC_AI_BURST", 5))
+# Batch work (season recaps) draws from its own, smaller bucket; keep both rates within the key's quota
+AI_BATCH_RATE_PER_MIN = float(os.environ.get("SMFC_AI_BATCH_RATE_PER_MIN", 10))
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self, api_key, model=GEMINI_MODEL, timeout=REQUEST_TIMEOUT):
+        # Imported here so the offline providers work without the SDK installed
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model)
+        self.timeout = timeout
+
+    def stream(self, prompt, feature=None):
+        # Gemini chunks as they arrive; blocked/empty chunks are skipped
+        for chunk in self.model.generate_content(prompt, stream=True, request_options={"timeout": self.timeout}):
+            try: text = chunk.text
+            except ValueError: continue
+            if text: yield text
+
+class LocalLLM:
+    # Deterministic template answers built from the prompt itself: same prompt -> same text,
+    # on any machine. latency is slept before the first chunk, chunk_delay between lines.
+    name = "local"
+    PANEL = ["Kaarthumbi", "Induchoodan", "Bellary Raja", "Appukuttan", "Ponjikkara"]
+    QUIPS = [
+        "{p} is playing like the ground is family property!", "Mone Dinesha, {p} has the form of a tiger!",
+        "Yenthaada uvve, {p} is pure profit for the team.", "Akosoto! {p} is very high class, no doubt.",
+        "I want to go home, but first {p} needs to pass the ball.", "Ayyo, {p} needs more chaaya before kickoff.",
+    ]
+    MOMENTS = [
+        "{p} dances past two defenders like Mohanlal in Spadikam!", "{p} fires a rocket, the keeper is still searching for it!",
+        "What a tackle from {p}, pure CBI investigation!", "{p} with a sharp, elegant through ball. Kidilam!",
+        "{p} misses an open goal. Ayyo, the crowd is crying!",
+    ]
+
+    def __init__(self, latency=0.0, chunk_delay=0.0, seed=0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.seed = seed
+
+    def names(self, prompt):
+        # Players from the context block ("Name: #rank ...") or the team lists ("TEAM:** a, b")
+        found = re.findall(r'^(\S[^:\n]*): #\d+', prompt, flags=re.M)
+        for team in re.findall(r'TEAM:\*\*\s*([^\n]+)', prompt): found += [n.strip() for n in team.split(',')]
+        return [n for n in dict.fromkeys(found) if n] or ["the Guest"]
+
+    def lines(self, prompt, feature):
+        rng = random.Random(zlib.crc32(f"{self.seed}:{feature}:{prompt}".encode()))
+        players = self.names(prompt)
+        if feature == "commentary":
+            out = [f"⏰ **Min {m}:** {rng.choice(self.MOMENTS).format(p=rng.choice(players))}" for m in sorted(rng.sample(range(5, 90), 4))]
+            result = re.search(r'RESULT:\*\*\s*([^\n]+)', prompt)
+            return out + [f"🏆 **FULL TIME:** {result.group(1).strip() if result else 'What a match!'}"]
+        return [json.dumps({"speaker": self.PANEL[i % len(self.PANEL)], "message": rng.choice(self.QUIPS).format(p=rng.choice(players))}, ensure_ascii=False) for i in range(10)]
+
+    def stream(self, prompt, feature=None):
+        if self.latency: time.sleep(self.latency)
+        for line in self.lines(prompt, feature):
+            if self.chunk_delay: time.sleep(self.chunk_delay)
+            yield line + "\n"
+
+def prompt_key(prompt, feature):
+    return hashlib.sha1(f"{feature}\x1f{prompt}".encode()).hexdigest()
+
+class ReplayLLM:
+    # Serves responses recorded in a JSONL file ({"key", "feature", "response"} per line).
+    # With `record` set to another provider, misses go to it and get appended to the file;
+    # otherwise misses go to `fallback` (LocalLLM by default), so a replay run never hangs.
+    name = "replay"
+
+    def __init__(self, path=REPLAY_PATH, record=None, fallback=None, chunk_size=80):
+        self.path = path
+        self.record = record
+        self.fallback = fallback or LocalLLM()
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.responses = {}
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self.responses[row["key"]] = row["response"]
+        except (OSError, ValueError): pass
+
+    def stream(self, prompt, feature=None):
+        key = prompt_key(prompt, feature)
+        if key in self.responses:
+            text = self.responses[key]
+            yield from (text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size))
+            return
+        if self.record is None:
+            yield from self.fallback.stream(prompt, feature)
+            return
+        parts = []
+        for chunk in self.record.stream(prompt, feature):
+            parts.append(chunk)
+            yield chunk
+        self.save(key, feature, "".join(parts))
+
+    def save(self, key, feature, response):
+        with self.lock:
+            self.responses[key] = response
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f: f.write(json.dumps({"key": key, "feature": feature, "response": response}) + "\n")
+
+# --- ⏱️ OVERHEAD ACCOUNTING ---
+# model_s is time spent blocked inside the provider's iterator; everything else between the
+# call starting and the stream being drained (cache lookups, prompt building, our own chunk
+# handling) is our overhead. Both land in the ai_metrics log for every call.
+
+def run_stream(llm, prompt, feature, started=None, session=None):
+    # llm.stream() with the model's share of the wall time measured separately
+    started = started or time.perf_counter()
+    model_s, first_chunk_s, error = 0.0, None, None
+    parts = []
+    chunks = iter(llm.stream(prompt, feature))
+    try:
+        while True:
+            t = time.perf_counter()
+            try: chunk = next(chunks)
+            except StopIteration: break
+            finally: model_s += time.perf_counter() - t
+            if first_chunk_s is None: first_chunk_s = time.perf_counter() - started
+            parts.append(chunk)
+            yield chunk
+    except GeneratorExit:
+        # The reader stopped early (cancelled / abandoned ai_jobs job)
+        error = "cancelled"
+        raise
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        total_s = time.perf_counter() - started
+        record_call(feature, session, getattr(llm, "name", None), prompt, "".join(parts), first_chunk_s, model_s, total_s, error=error)
+
+# --- 🚦 CLIENT MANAGER ---
+# One managed client per process: the wrapped provider (and its configured SDK client) is
+# built once and shared by every session, calls draw from a shared token bucket, and
+# transient failures are retried with jittered backoff as long as the retry budget allows.
+
+TRANSIENT_ERRORS = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "TimeoutError", "ConnectionError"}
+
+def is_transient(e):
+    return type(e).__name__ in TRANSIENT_ERRORS or getattr(e, "code", None) in (429, 500, 503, 504)
+
+class RateLimited(Exception):
+    pass
+
+class TokenBucket:
+    def __init__(self, rate_per_min=AI_RATE_PER_MIN, burst=AI_BURST):
+        self.rate = rate_per_min / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=20):
+        # Blocks (on the calling ai_jobs worker, never the page) until a token is free
+        give_up = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > give_up: return False
+            time.sleep(wait)
+
+class RetryBudget:
+    # Retries may add at most `ratio` extra calls per successful call (plus a small reserve),
+    # so an outage doesn't turn every request into max_retries requests
+    def __init__(self, ratio=0.2, reserve=3):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = float(reserve)
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock: self.tokens = min(self.reserve + 10, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self.lock:
+            if self.tokens < 1: return False
+            self.tokens -= 1
+            return True
+
+class ManagedLLM:
+    def __init__(self, llm, bucket=None, budget=None, max_retries=3, backoff=1.0, max_backoff=8.0, max_wait=20):
+        self.llm = llm
+        self.name = llm.name
+        self.bucket = bucket or TokenBucket()
+        self.budget = budget or RetryBudget()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.counters = {"calls": 0, "ok": 0, "errors": 0, "retries": 0, "rate_limited": 0, "budget_exhausted": 0}
+        self.error_types = {}
+        self.latency = {"first_chunk": deque(maxlen=200), "total": deque(maxlen=200)}
+
+    def count(self, name, n=1):
+        with self.lock: self.counters[name] += n
+
+    def stream(self, prompt, feature=None):
+        self.count("calls")
+        attempt = 0
+        while True:
+            if not self.bucket.acquire(self.max_wait):
+                self.count("rate_limited")
+                raise RateLimited("too many AI requests right now")
+            started = time.perf_counter()
+            yielded = False
+            try:
+                for chunk in self.llm.stream(prompt, feature):
+                    if not yielded:
+                        with self.lock: self.latency["first_chunk"].append(time.perf_counter() - started)
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                with self.lock:
+                    self.counters["errors"] += 1
+                    self.error_types[type(e).__name__] = self.error_types.get(type(e).__name__, 0) + 1
+                # Half-streamed answers can't be retried without duplicating text on screen
+                if yielded or not is_transient(e) or attempt >= self.max_retries: raise
+                if not self.budget.withdraw():
+                    self.count("budget_exhausted")
+                    raise
+                attempt += 1
+                self.count("retries")
+                time.sleep(min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+                continue
+            with self.lock:
+                self.counters["ok"] += 1
+                self.latency["total"].append(time.perf_counter() - started)
+            self.budget.deposit()
+            return
+
+    def stats(self):
+        with self.lock:
+            return {
+                **self.counters, "error_types": dict(self.error_types),
+                **{f"{k}_p{int(q * 100)}_s": pct(v, q) for k, v in self.latency.items() for q in (0.5, 0.95)},
+            }
+
+# --- 🔌 SELECTION ---
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm(api_key=None):
+    # SMFC_LLM_PROVIDER: gemini (default, needs api_key) | local | replay | record.
+    # Returns None when Gemini is selected but there is no key. Whatever is picked is built
+    # once and wrapped in ManagedLLM, so every session shares one client and one rate limit.
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            choice = os.environ.get("SMFC_LLM_PROVIDER", "gemini")
+            latency = float(os.environ.get("SMFC_LLM_LATENCY", 0))
+            llm = None
+            if choice == "local": llm = LocalLLM(latency=latency)
+            elif choice == "replay": llm = ReplayLLM(fallback=LocalLLM(latency=latency))
+            elif api_key: llm = ReplayLLM(record=GeminiProvider(api_key)) if choice == "record" else GeminiProvider(api_key)
+            if llm is not None: _llm = ManagedLLM(llm)
+        return _llm
+
+_batch_llm = None
+
+def get_batch_llm(api_key=None):
+    # The same provider as get_llm(), wrapped in a second ManagedLLM with its own token bucket
+    # and retry budget, so a long batch can't starve the interactive features of either
+    global _batch_llm
+    shared = get_llm(api_key)
+    if shared is None: return None
+    provider = getattr(shared, "llm", shared)
+    with _llm_lock:
+        if _batch_llm is None or _batch_llm.llm is not provider:
+            _batch_llm = ManagedLLM(provider, bucket=TokenBucket(rate_per_min=AI_BATCH_RATE_PER_MIN, burst=1))
+        return _batch_llm
+
+def set_llm(llm, managed=True):
+    global _llm
+    with _llm_lock: _llm = ManagedLLM(llm) if managed and not isinstance(llm, ManagedLLM) else llm
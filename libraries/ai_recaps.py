@@ -0,0 +1,164 @@
+# libraries/ai_recaps.py
+# Season recaps, generated in bulk ahead of time and served from disk. Every Match_History
+# row gets a commentary-style recap of the real result; the store doubles as the checkpoint,
+# so a rerun only does the matches that are still missing (or failed last time). Runs draw
+# from the batch rate budget (ai_providers.get_batch_llm), never the interactive one.
+#   python -m libraries.ai_recaps --history match_history.csv --season 2025 --workers 3
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+try:
+    from libraries.ai_providers import get_batch_llm, run_stream
+except ImportError:
+    from ai_providers import get_batch_llm, run_stream
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECAP_PATH = os.environ.get("SMFC_RECAP_STORE", os.path.join(ROOT_DIR, "data", "recaps.jsonl"))
+RECAP_WORKERS = 3
+
+def score(value):
+    # The sheet hands back 3, the CSV export 3.0; both are the same goal count
+    try: return int(float(value))
+    except (TypeError, ValueError): return value
+
+def match_id(row):
+    # Stable across re-exports of the sheet: what was played, not where the row sits
+    raw = f"{row['Date']}|{row['Team_Blue']}|{row['Team_Red']}|{score(row['Score_Blue'])}-{score(row['Score_Red'])}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+def build_recap_prompt(row):
+    return f"""
+    You are a hilarious Malayalam Football Commentator (like Shaiju Damodaran on caffeine), looking back at a match that was already played.
+
+    **THE MATCH ({row['Date']}):**
+    🔵 **BLUE TEAM:** {row['Team_Blue']}
+    🔴 **RED TEAM:** {row['Team_Red']}
+
+    **THE RESULT:** Blue {score(row['Score_Blue'])} - {score(row['Score_Red'])} Red (Winner: {row['Winner']}).
+
+    **STRICT RULES:**
+    1. **LANGUAGE BALANCE:** **80% English**, **20% Malayalam** (Emotional outbursts/Exclamations).
+    2. **STICK TO THE RESULT:** The score above is final. Do NOT invent a different one.
+    3. **ANCHAL (Internal Context):** Treat her moves as elegant and sharp. Do NOT mention "North Indian", age, "Lady", or "Girl". Just use her name.
+
+    **INSTRUCTIONS:**
+    - Write a **funny 3-point recap** of key moments.
+    - **Format:**
+      ⏰ **Min 20:** [Event]
+      ...
+      🏆 **FULL TIME:** [Summary]
+    """
+
+class RecapStore:
+    # Append-only JSONL ({"id", "date", "status", "text", "at"}); the last line per id wins
+    def __init__(self, path=RECAP_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.rows = {}
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self.rows[row["id"]] = row
+        except (OSError, ValueError): pass
+
+    def done(self, mid):
+        return self.rows.get(mid, {}).get("status") == "done"
+
+    def get(self, mid):
+        return self.rows[mid]["text"] if self.done(mid) else None
+
+    def put(self, mid, date, status, text=""):
+        row = {"id": mid, "date": str(date), "status": status, "text": text, "at": time.time()}
+        with self.lock:
+            self.rows[mid] = row
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # One line per finished match = a checkpoint a crash can't lose more than one match of
+            with open(self.path, "a") as f: f.write(json.dumps(row) + "\n")
+
+def season_rows(history_df, season=None):
+    rows = history_df.dropna(subset=["Date"])
+    if season: rows = rows[rows["Date"].astype(str).str.startswith(str(season))]
+    return rows
+
+def generate_recap(llm, row):
+    return "".join(run_stream(llm, build_recap_prompt(row), "recap", session="recaps")).strip()
+
+def run_recaps(history_df, season=None, workers=RECAP_WORKERS, store=None, llm=None, progress=None):
+    # Returns {"done", "failed", "skipped"} counts. Concurrency is capped by `workers`; the batch
+    # client's rate limit and retries (ai_providers.ManagedLLM) still apply to every call.
+    store = store or RecapStore()
+    llm = llm or get_batch_llm(api_key=os.environ.get("GEMINI_API_KEY"))
+    if llm is None: raise RuntimeError("No LLM configured (set GEMINI_API_KEY or SMFC_LLM_PROVIDER=local)")
+    rows = [r for _, r in season_rows(history_df, season).iterrows()]
+    todo = [r for r in rows if not store.done(match_id(r))]
+    counts = {"done": 0, "failed": 0, "skipped": len(rows) - len(todo)}
+    if progress: progress(counts, len(todo))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate_recap, llm, r): r for r in todo}
+        for future in as_completed(futures):
+            r = futures[future]
+            try:
+                text = future.result()
+                store.put(match_id(r), r["Date"], "done" if text else "failed", text)
+                counts["done" if text else "failed"] += 1
+            except Exception as e:
+                store.put(match_id(r), r["Date"], "failed", str(e))
+                counts["failed"] += 1
+            if progress: progress(counts, len(todo))
+    return counts
+
+class RecapBatch:
+    # One run_recaps on a background thread, so the admin page only polls its progress
+    def __init__(self, history_df, season=None, workers=RECAP_WORKERS, store=None, llm=None):
+        self.counts = {"done": 0, "failed": 0, "skipped": 0}
+        self.total = None
+        self.status = "running"
+        self.error = None
+        self.thread = threading.Thread(target=self.run, args=(history_df, season, workers, store, llm), daemon=True)
+        self.thread.start()
+
+    def run(self, history_df, season, workers, store, llm):
+        try:
+            self.counts = run_recaps(history_df, season, workers, store, llm, progress=self.report)
+            self.status = "done"
+        except Exception as e:
+            self.status, self.error = "error", str(e)
+
+    def report(self, counts, total):
+        self.counts, self.total = dict(counts), total
+
+    def done(self):
+        return self.status != "running"
+
+_batch = None
+_batch_lock = threading.Lock()
+
+def start_recaps(history_df, season=None, **kwargs):
+    # At most one batch per process: while one is running, asking again returns it
+    global _batch
+    with _batch_lock:
+        if _batch is None or _batch.done(): _batch = RecapBatch(history_df, season, **kwargs)
+        return _batch
+
+def current_recaps():
+    return _batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate AI match recaps for Match_History.")
+    parser.add_argument("--history", required=True, help="CSV export of the Match_History sheet")
+    parser.add_argument("--season", default=None, help="Only matches whose Date starts with this (e.g. 2025)")
+    parser.add_argument("--workers", type=int, default=RECAP_WORKERS)
+    args = parser.parse_args()
+    history = pd.read_csv(args.history)
+    def report(counts, total): print(f"\r{counts['done'] + counts['failed']}/{total} ({counts['failed']} failed)", end="", flush=True)
+    counts = run_recaps(history, args.season, args.workers, progress=report)
+    print(f"\nDone: {counts['done']} new, {counts['failed']} failed, {counts['skipped']} already stored")
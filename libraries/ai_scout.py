@@ -1,29 +1,41 @@
 import streamlit as st
-import google.generativeai as genai
+import json
 import random
+import time
+
+try:
+    from libraries.ai_cache import ResponseCache, normalize_question, frame_fingerprint, cache_key
+    from libraries.ai_context import build_context
+    from libraries.ai_providers import get_batch_llm, get_llm, run_stream
+    from libraries.ai_metrics import record_call
+except ImportError:
+    from ai_cache import ResponseCache, normalize_question, frame_fingerprint, cache_key
+    from ai_context import build_context
+    from ai_providers import get_batch_llm, get_llm, run_stream
+    from ai_metrics import record_call
+
+# Same question on the same leaderboard/history -> same answer, straight from disk
+SCOUT_CACHE = ResponseCache("scout", max_entries=200, ttl=6 * 3600)
+# Bump whenever build_scout_prompt or its output format changes, so old answers stop matching
+SCOUT_PROMPT_VERSION = 3
 
 # --- CONFIG ---
-def configure_genai():
-    if "api" not in st.secrets or "gemini" not in st.secrets["api"]:
-        return False
-    genai.configure(api_key=st.secrets["api"]["gemini"])
-    return True
+def gemini_key():
+    try: return st.secrets["api"]["gemini"]
+    except Exception: return None
+
+def configure_llm():
+    # The provider picked by SMFC_LLM_PROVIDER (Gemini by default); None if Gemini has no key
+    return get_llm(api_key=gemini_key())
+
+def configure_batch_llm():
+    # Same provider, but the batch rate budget (season recaps)
+    return get_batch_llm(api_key=gemini_key())
 
 # --- 1. CHATBOT (80% English Rule Added) ---
-def ask_ai_scout(user_query, leaderboard_df, history_df):
-    if not configure_genai(): return "Kaarthumbi: Ayyo! API Key missing!"
-    
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    # Context
-    lb_summary = leaderboard_df.to_string(index=True) if not leaderboard_df.empty else "No Stats Available"
-    hist_summary = ""
-    if not history_df.empty:
-        recent = history_df.sort_values('Date', ascending=False).head(5)
-        for _, row in recent.iterrows():
-            hist_summary += f"- {row['Date']}: Blue {row['Score_Blue']}-{row['Score_Red']} Red (Winner: {row['Winner']})\n"
-    else:
-        hist_summary = "No matches played recently."
+def build_scout_prompt(user_query, leaderboard_df, history_df):
+    # Only the slice of the table the question needs, capped at CONTEXT_TOKEN_BUDGET
+    lb_summary, _ = build_context(user_query, leaderboard_df, history_df)
 
     prompt = f"""
     You are the Creative Director of a funny Malayalam movie character football panel.
@@ -48,20 +60,62 @@ def ask_ai_scout(user_query, leaderboard_df, history_df):
     **User Question:** "{user_query}"
     
     **Instructions:** Write a 10-line funny script. Kaarthumbi starts.
-    **Format:** Name: Message
+    **Format:** One JSON object per line and nothing else (no list, no code fences):
+    {{"speaker": "Kaarthumbi", "message": "..."}}
     """
+    return prompt
+
+def parse_transcript(text):
+    # -> [(speaker, message)]. Expects the JSON-lines format asked for above; plain
+    # "Name: Message" lines (older cached answers, error strings) are still understood.
+    turns = []
+    for line in text.splitlines():
+        line = line.strip().rstrip(',')
+        if not line or line.startswith('```'): continue
+        if line.startswith('{'):
+            try:
+                turn = json.loads(line)
+                turns.append((str(turn.get("speaker", "")).strip(), str(turn.get("message", "")).strip()))
+                continue
+            except (ValueError, AttributeError): pass
+        name, sep, msg = line.partition(':')
+        if sep: turns.append((name.replace('*', '').strip(), msg.strip()))
+    return [(name, msg) for name, msg in turns if name and msg]
+
+def stream_ai_scout(user_query, leaderboard_df, history_df, session=None):
+    # Yields text chunks; a cached answer comes back as a single chunk.
+    # `session` only tags the ai_metrics rows for this call.
+    started = time.perf_counter()
+    llm = configure_llm()
+    if llm is None:
+        record_call("scout", session, error="no_llm")
+        yield "Kaarthumbi: Ayyo! API Key missing!"
+        return
+
+    key = cache_key(SCOUT_PROMPT_VERSION, llm.name, normalize_question(user_query), frame_fingerprint(leaderboard_df, history_df))
+    cached = SCOUT_CACHE.get(key)
+    if cached:
+        record_call("scout", session, llm.name, response=cached, total_s=time.perf_counter() - started, cache_hit=True)
+        yield cached
+        return
+
+    prompt = build_scout_prompt(user_query, leaderboard_df, history_df)
+    parts = []
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        for text in run_stream(llm, prompt, "scout", started, session):
+            parts.append(text)
+            yield text
     except Exception as e:
-        return f"Kaarthumbi: Ayyo! The spirits are silent! ({str(e)})"
+        yield f"\nKaarthumbi: Ayyo! The spirits are silent! ({str(e)})"
+        return
+    answer = "".join(parts).strip()
+    if answer: SCOUT_CACHE.set(key, answer) # errors are never cached
 
-# --- 2. MATCH SIMULATOR (80% English Rule Added) ---
-def simulate_match_commentary(red_team_list, blue_team_list, red_ovr, blue_ovr):
-    if not configure_genai(): return "System: API Key missing!"
-    
-    model = genai.GenerativeModel('gemini-2.0-flash')
+def ask_ai_scout(user_query, leaderboard_df, history_df, session=None):
+    return "".join(stream_ai_scout(user_query, leaderboard_df, history_df, session)).strip()
 
+# --- 2. MATCH SIMULATOR (80% English Rule Added) ---
+def build_commentary_prompt(red_team_list, blue_team_list, red_ovr, blue_ovr):
     # Determine Winner Logic
     red_weight = red_ovr / (red_ovr + blue_ovr)
     if random.random() < red_weight:
@@ -96,9 +150,21 @@ def simulate_match_commentary(red_team_list, blue_team_list, red_ovr, blue_ovr):
       ...
       🏆 **FULL TIME:** [Summary]
     """
-    
+    return prompt
+
+def stream_match_commentary(red_team_list, blue_team_list, red_ovr, blue_ovr, session=None):
+    started = time.perf_counter()
+    llm = configure_llm()
+    if llm is None:
+        record_call("commentary", session, error="no_llm")
+        yield "System: API Key missing!"
+        return
+
+    prompt = build_commentary_prompt(red_team_list, blue_team_list, red_ovr, blue_ovr)
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        yield from run_stream(llm, prompt, "commentary", started, session)
     except Exception as e:
-        return f"Commentary Box: Signal Lost! ({str(e)})"
\ No newline at end of file
+        yield f"\nCommentary Box: Signal Lost! ({str(e)})"
+
+def simulate_match_commentary(red_team_list, blue_team_list, red_ovr, blue_ovr, session=None):
+    return "".join(stream_match_commentary(red_team_list, blue_team_list, red_ovr, blue_ovr, session)).strip()
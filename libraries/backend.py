@@ -48,12 +48,26 @@ def get_counts():
     guest_count = len(get_guests_list())
     return smfc_count, guest_count, smfc_count + guest_count
 
-def toggle_selection(idx):
-    if 'Selected' in st.session_state.master_db.columns:
-        current_val = bool(st.session_state.master_db.at[idx, 'Selected'])
-        st.session_state.master_db.at[idx, 'Selected'] = not current_val
-        if 'ui_version' not in st.session_state: st.session_state.ui_version = 0
-        st.session_state.ui_version += 1
+def filter_roster(df, position="ALL", query=""):
+    if df.empty or 'Name' not in df.columns: return df
+    view = df
+    if position != "ALL" and 'Position' in view.columns: view = view[view['Position'] == position]
+    query = query.strip().lower()
+    if query: view = view[view['Name'].astype(str).str.lower().str.contains(query, regex=False)]
+    return view.sort_values("Name")
+
+def reset_checklist_view(reset_page=True):
+    # New editor key -> drops stale 'edited_rows' that point at the old view
+    if reset_page: st.session_state.lobby_page = 1
+    st.session_state.checklist_version = st.session_state.get('checklist_version', 0) + 1
+
+def apply_checklist_edits(editor_key, view_index):
+    # 'edited_rows' is cumulative for the editor's lifetime, so re-applying all of it is idempotent
+    edits = st.session_state.get(editor_key, {}).get('edited_rows', {})
+    for row_pos, changes in edits.items():
+        row_pos = int(row_pos)
+        if 'Selected' in changes and row_pos < len(view_index):
+            st.session_state.master_db.at[view_index[row_pos], 'Selected'] = bool(changes['Selected'])
 
 # --- CALCULATIONS ---
 def parse_match_log(text):
@@ -4,8 +4,11 @@ from datetime import datetime, timedelta
 import re
 import os
 import io
+import hashlib
+import html
+import time
+import uuid
 import textwrap
-import streamlit.components.v1 as components
 from mplsoccer import Pitch
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as path_effects
@@ -15,23 +18,520 @@ try:
     from libraries.styles import apply_custom_css
     from libraries.backend import (
         load_data, get_counts, get_guests_list, extract_whatsapp_players, 
-        clean_player_name, toggle_selection, calculate_player_score, 
-        calculate_leaderboard, parse_match_log, formation_presets
+        clean_player_name, filter_roster, reset_checklist_view, apply_checklist_edits,
+        calculate_player_score, calculate_leaderboard, parse_match_log, formation_presets
     )
-    from libraries.ai_scout import ask_ai_scout, simulate_match_commentary
+    from libraries.ai_scout import stream_ai_scout, stream_match_commentary, configure_llm, configure_batch_llm, parse_transcript, SCOUT_CACHE
+    from libraries.ai_recaps import RecapStore, match_id, start_recaps, current_recaps
+    from libraries.share import share_buttons
+    from libraries.ai_jobs import get_runner, AI_ABANDON_AFTER, AI_DEADLINE
+    from libraries.ai_metrics import METRICS, summarize, recent_errors
 except ImportError:
     from styles import apply_custom_css
     from backend import (
         load_data, get_counts, get_guests_list, extract_whatsapp_players, 
-        clean_player_name, toggle_selection, calculate_player_score, 
-        calculate_leaderboard, parse_match_log, formation_presets
+        clean_player_name, filter_roster, reset_checklist_view, apply_checklist_edits,
+        calculate_player_score, calculate_leaderboard, parse_match_log, formation_presets
     )
-    from ai_scout import ask_ai_scout, simulate_match_commentary
+    from ai_scout import stream_ai_scout, stream_match_commentary, configure_llm, configure_batch_llm, parse_transcript, SCOUT_CACHE
+    from ai_recaps import RecapStore, match_id, start_recaps, current_recaps
+    from share import share_buttons
+    from ai_jobs import get_runner, AI_ABANDON_AFTER, AI_DEADLINE
+    from ai_metrics import METRICS, summarize, recent_errors
+
+CHECKLIST_PAGE_SIZE = 30
+AI_POLL_SECONDS = 0.5
+RECAP_POLL_SECONDS = 2
+SPECULATIVE_TTL = 600 # an unclaimed pre-generated commentary is kept this long
+SPECULATIVE_DEADLINE = 300 # nobody is waiting on it yet, so a slow model gets longer than AI_DEADLINE
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_leaderboard(df_m, official_names):
+    # Keyed on the match table + roster, so Ask / re-renders don't redo the per-row loop
+    return calculate_leaderboard(df_m, set(official_names))
+
+# --- SHARED STATE HELPERS ---
+def get_match_settings():
+    match_date = st.session_state.get('match_date_input', datetime.today().date())
+    match_time = st.session_state.get('match_time_input', datetime.now().time())
+    venue_opt = st.session_state.get('venue_select', "BFC")
+    venue = st.session_state.get('venue_text', "Ground") if venue_opt == "Other" else venue_opt
+    duration = st.session_state.get('duration_slider', 90)
+    return match_date, match_time, venue, duration
+
+def split_squad():
+    pos_map = {"GK": 0, "DEF": 1, "MID": 2, "FWD": 3}
+    st.session_state.match_squad['Pos_Ord'] = st.session_state.match_squad['Position'].map(pos_map).fillna(4)
+    reds = st.session_state.match_squad[st.session_state.match_squad["Team"] == "Red"].sort_values('Pos_Ord')
+    blues = st.session_state.match_squad[st.session_state.match_squad["Team"] == "Blue"].sort_values('Pos_Ord')
+    return reds, blues
+
+def ai_session():
+    # Short per-browser-session tag for the ai_metrics log
+    if 'ai_session' not in st.session_state: st.session_state.ai_session = uuid.uuid4().hex[:8]
+    return st.session_state.ai_session
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_ai_metrics(hours):
+    return METRICS.read(since=datetime.now().timestamp() - hours * 3600)
+
+@st.cache_resource(ttl=300)
+def get_recap_store():
+    # Precomputed by ai_recaps (CLI or the admin tab); re-read every few minutes
+    return RecapStore()
+
+@st.fragment(run_every=RECAP_POLL_SECONDS)
+def render_recap_progress():
+    # The background recap batch's progress; only this fragment reruns while it works, and the
+    # whole page once, when it finishes
+    batch = current_recaps()
+    if batch is None: return
+    if batch.done():
+        get_recap_store.clear()
+        st.rerun(scope="app")
+    finished = batch.counts['done'] + batch.counts['failed']
+    if batch.total is None: st.progress(0.0, text="Starting...")
+    else: st.progress(finished / batch.total if batch.total else 1.0, text=f"{finished}/{batch.total}")
+
+def lineup_key(reds, blues):
+    # Same players on the same sides -> same key, whatever order they were picked in
+    return hashlib.sha1(f"{sorted(reds['Name'])}|{sorted(blues['Name'])}".encode()).hexdigest()
+
+def speculate_commentary():
+    # Starts commentary for a lineup as soon as it is finalised, so SIMULATE usually finds it
+    # ready. A pending spec for an older lineup is cancelled; nothing starts if the AI pool is backed up.
+    reds, blues = split_squad()
+    key = lineup_key(reds, blues)
+    spec = st.session_state.get('commentary_spec')
+    if spec and spec['key'] == key: return
+    if spec: spec['job'].cancel()
+    st.session_state.commentary_spec = None
+    runner = get_runner()
+    if reds.empty or blues.empty or runner.stats()['queued']: return
+    job = runner.submit(stream_match_commentary, list(reds['Name']), list(blues['Name']), st.session_state.red_ovr, st.session_state.blue_ovr, ai_session(), deadline=SPECULATIVE_DEADLINE, abandon_after=SPECULATIVE_TTL)
+    st.session_state.commentary_spec = {'key': key, 'job': job}
+
+def claim_commentary(reds, blues):
+    # The speculative job for this exact lineup, if it is still usable (taken at most once)
+    spec = st.session_state.get('commentary_spec')
+    if not spec or spec['key'] != lineup_key(reds, blues) or spec['job'].status not in ("queued", "running", "done"): return None
+    st.session_state.commentary_spec = None
+    # Watched from now on, like any other job: the claim counts as its first poll
+    spec['job'].seen = time.time()
+    spec['job'].abandon_after = AI_ABANDON_AFTER
+    spec['job'].deadline = min(spec['job'].deadline, time.time() + AI_DEADLINE)
+    return spec['job']
+
+@st.cache_data(show_spinner=False, max_entries=20)
+def render_lineup_png(red_names, blue_names, fmt, subtitle):
+    # Keyed on the lineup itself, so reruns that don't touch the squad skip the matplotlib work
+    pitch = Pitch(pitch_type='custom', pitch_length=100, pitch_width=100, pitch_color='#43a047', line_color='white')
+    fig, ax = pitch.draw(figsize=(10, 12)) 
+    ax.text(50, 108, "SMFC MATCH DAY", color='#FF5722', ha='center', fontsize=26, fontweight='900', fontfamily='sans-serif', path_effects=[path_effects.withStroke(linewidth=3, foreground='black')])
+    ax.text(50, 103, subtitle, color='black', ha='center', fontsize=16, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=2, foreground='white')])
+
+    def draw_player(player_name, x, y, color):
+        pitch.scatter(x, y, s=600, marker='h', c=color, edgecolors='white', linewidth=2, ax=ax, zorder=2)
+        ax.text(x, y-4, player_name, color='black', ha='center', fontsize=10, fontweight='bold', bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="black", lw=1), zorder=3)
+
+    coords_map = formation_presets.get(fmt, formation_presets['9 vs 9'])
+    r_spots = coords_map.get("RED_COORDS", []); b_spots = coords_map.get("BLUE_COORDS", [])
+    subs_r = []
+    for i, name in enumerate(red_names):
+        if i < len(r_spots): draw_player(name, r_spots[i][0], r_spots[i][1], '#ff4b4b')
+        else: subs_r.append(name)
+    subs_b = []
+    for i, name in enumerate(blue_names):
+        if i < len(b_spots): draw_player(name, b_spots[i][0], b_spots[i][1], '#1c83e1')
+        else: subs_b.append(name)
+
+    if subs_r or subs_b:
+        ax.text(50, -2, "SUBSTITUTES", color='white', ha='center', fontsize=14, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=2, foreground='black')])
+        r_text = "\n".join(subs_r) if subs_r else "None"
+        ax.text(25, -5, f"RED SQUAD\n{r_text}", color='#ff4b4b', ha='center', va='top', fontsize=10, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=1, foreground='black')])
+        b_text = "\n".join(subs_b) if subs_b else "None"
+        ax.text(75, -5, f"BLUE SQUAD\n{b_text}", color='#1c83e1', ha='center', va='top', fontsize=10, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=1, foreground='black')])
+
+    img_buf = io.BytesIO()
+    fig.savefig(img_buf, format='png', bbox_inches='tight', dpi=150, facecolor='#43a047')
+    plt.close(fig)
+    return img_buf.getvalue(), subs_r, subs_b
+
+# --- FRAGMENTS ---
+# Each section reruns on its own for widget interactions inside it. Anything that changes
+# state another section reads (squad, selection bulk edits, match log) still calls a full st.rerun().
+
+def render_lobby_checklist():
+    # Depends on: master_db['Selected'], guest_input_val
+    smfc_n, guest_n, total_n = get_counts()
+    st.markdown(f"""<div class="section-box"><div style="display:flex; justify-content:space-between; align-items:center;"><div style="color:#FF5722; font-weight:bold; font-size:20px; font-family:Rajdhani;">PLAYER POOL</div><div class="badge-box"><div class="badge-smfc">{smfc_n} SMFC</div><div class="badge-guest">{guest_n} GUEST</div><div class="badge-total">{total_n} TOTAL</div></div></div>""", unsafe_allow_html=True)
+    # --- PLAYER CHECKLIST: one paginated editor, key only changes when the view does ---
+    if 'Name' in st.session_state.master_db.columns:
+        c_search, c_pos = st.columns([3, 2])
+        with c_search: st.text_input("Search", key="lobby_search", placeholder="Search players...", label_visibility="collapsed", on_change=reset_checklist_view)
+        with c_pos: st.radio("Position", ["ALL", "FWD", "MID", "DEF"], key="lobby_pos", horizontal=True, label_visibility="collapsed", on_change=reset_checklist_view)
+        roster_view = filter_roster(st.session_state.master_db, st.session_state.get('lobby_pos', "ALL"), st.session_state.get('lobby_search', ""))
+        n_pages = max(1, -(-len(roster_view) // CHECKLIST_PAGE_SIZE))
+        if st.session_state.lobby_page > n_pages: st.session_state.lobby_page = n_pages
+        if n_pages > 1: st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, step=1, key="lobby_page", on_change=reset_checklist_view, args=(False,))
+        page = st.session_state.lobby_page
+        page_view = roster_view.iloc[(page - 1) * CHECKLIST_PAGE_SIZE : page * CHECKLIST_PAGE_SIZE]
+        editor_key = f"lobby_editor_v{st.session_state.checklist_version}"
+        st.data_editor(
+            page_view[['Selected', 'Name', 'Position']], key=editor_key, hide_index=True, use_container_width=True,
+            disabled=['Name', 'Position'], column_config={"Selected": st.column_config.CheckboxColumn("IN", width="small")},
+            on_change=apply_checklist_edits, args=(editor_key, page_view.index.tolist())
+        )
+
+def render_position_editor():
+    # Depends on: master_db['Selected'], position_changes
+    with st.expander("🛠️ EDIT POSITIONS (Session Only)", expanded=False):
+        selected_players = st.session_state.master_db[st.session_state.master_db['Selected'] == True]
+        if not selected_players.empty:
+            c_p_sel, c_p_pos, c_p_btn = st.columns([3.5, 2, 2.5])
+            with c_p_sel:
+                p_opts = [f"{row['Name']} ({row['Position']})" for _, row in selected_players.iterrows()]
+                p_to_edit_str = st.selectbox("Select Player", p_opts, key="edit_pos_player")
+            with c_p_pos: new_pos = st.selectbox("New Position", ["FWD", "MID", "DEF", "GK"], key="edit_pos_new")
+            with c_p_btn:
+                st.write(""); st.write("")
+                if st.button("UPDATE POS", key="btn_update_pos"):
+                    p_name_clean = p_to_edit_str.rsplit(" (", 1)[0]
+                    idx = st.session_state.master_db[st.session_state.master_db['Name'] == p_name_clean].index[0]
+                    old_pos = st.session_state.master_db.at[idx, 'Position']
+                    st.session_state.master_db.at[idx, 'Position'] = new_pos
+                    st.session_state.master_db.at[idx, 'Selected'] = True 
+                    st.session_state.checklist_version += 1
+                    st.session_state.position_changes.append(f"{p_name_clean}: {old_pos} → {new_pos}")
+                    st.rerun(scope="fragment")
+            if st.session_state.position_changes:
+                st.write(""); 
+                for change in st.session_state.position_changes: st.markdown(f"<div class='change-log-item'>{change}</div>", unsafe_allow_html=True)
+        else: st.info("Select players first.")
+
+@st.fragment
+def render_lobby():
+    # Everything that reads the selection or the guest list, so a tick or a guest edit
+    # reruns just this block: counter, checklist, guests, guest setup and position editor
+    render_lobby_checklist()
+    st.write(""); st.text_input("Guests (Comma separated)", key="guest_input_val"); st.markdown('</div>', unsafe_allow_html=True)
+    render_guest_setup()
+    render_position_editor()
+
+@st.fragment
+def render_guest_setup():
+    # Depends on: guest_input_val
+    guests = get_guests_list()
+    if guests:
+        st.write("---"); st.markdown("<h3 style='color:#FFD700; text-align:center; margin-bottom: 15px;'>GUEST SQUAD SETUP</h3>", unsafe_allow_html=True)
+        for g_name in guests:
+            c_name, c_pos, c_lvl = st.columns([3.5, 2, 2.5])
+            with c_name: st.markdown(f"<div class='guest-row-label'>{g_name}</div>", unsafe_allow_html=True)
+            with c_pos: st.selectbox("Pos", ["FWD", "MID", "DEF", "GK"], key=f"g_pos_{g_name}", label_visibility="collapsed")
+            with c_lvl: st.selectbox("Lvl", ["⭐⭐⭐⭐⭐", "⭐⭐⭐⭐", "⭐⭐⭐", "⭐⭐", "⭐"], index=2, key=f"g_lvl_{g_name}", label_visibility="collapsed")
+        st.write("---")
+
+@st.fragment
+def render_squad_panel():
+    # Depends on: match_squad, red_ovr/blue_ovr, match settings
+    if st.session_state.match_squad.empty: return
+    match_date, match_time, venue, duration = get_match_settings()
+    reds, blues = split_squad()
+    r_ovr = st.session_state.get('red_ovr', 0); b_ovr = st.session_state.get('blue_ovr', 0)
+    
+    # --- DISPLAY LINEUPS ---
+    red_html = ""; blue_html = ""
+    for _, p in reds.iterrows(): red_html += f"<div class='player-card kit-red'><span class='card-name'>{p['Name']}</span><span class='pos-badge'>{p['Position']}</span></div>"
+    for _, p in blues.iterrows(): blue_html += f"<div class='player-card kit-blue'><span class='card-name'>{p['Name']}</span><span class='pos-badge'>{p['Position']}</span></div>"
+    st.markdown(f"""
+    <div class="section-box">
+        <div style="color:#FF5722; font-weight:bold; font-size:18px; margin-bottom: 10px;">LINEUPS</div>
+        <div style="display: flex; gap: 8px;">
+            <div style="flex: 1; min-width: 0;"><h4 style='color:#ff4b4b; text-align:center; margin:0 0 5px 0; font-size:16px;'>RED <span style='font-size:12px; color:#aaa;'>({r_ovr})</span></h4>{red_html}</div>
+            <div style="width: 1px; background: rgba(255,255,255,0.1);"></div>
+            <div style="flex: 1; min-width: 0;"><h4 style='color:#1c83e1; text-align:center; margin:0 0 5px 0; font-size:16px;'>BLUE <span style='font-size:12px; color:#aaa;'>({b_ovr})</span></h4>{blue_html}</div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    dt_match = datetime.combine(match_date, match_time)
+    dt_end = dt_match + timedelta(minutes=duration)
+    str_date = dt_match.strftime('%A, %d %b'); str_time = f"{dt_match.strftime('%I:%M %p')} - {dt_end.strftime('%I:%M %p')}"
+    r_list = "\n".join([p['Name'] for p in reds.to_dict('records')]); b_list = "\n".join([p['Name'] for p in blues.to_dict('records')])
+    summary = f"Date: {str_date}\nTime: {str_time}\nGround: {venue}\nScore: Blue 0-0 Red\nCost per player: *\nGpay: *\nLateFee: 50\n\n🔵 *BLUE TEAM* ({b_ovr})\n{b_list}\n\n🔴 *RED TEAM* ({r_ovr})\n{r_list}"
+    share_buttons(summary, key="share_lineups")
+
+    st.write("---"); st.markdown("<h3 style='text-align:center; color:#FF5722;'>TRANSFER WINDOW</h3>", unsafe_allow_html=True)
+    col_tr_red, col_btn, col_tr_blue = st.columns([4, 1, 4])
+    red_opts = [f"{r['Name']} ({r['Position']})" for _, r in reds.iterrows()]; blue_opts = [f"{r['Name']} ({r['Position']})" for _, r in blues.iterrows()]
+    with col_tr_red: s_red_str = st.selectbox("Select Red", red_opts, key="sel_red", label_visibility="collapsed")
+    with col_tr_blue: s_blue_str = st.selectbox("Select Blue", blue_opts, key="sel_blue", label_visibility="collapsed")
+    with col_btn:
+        if st.button("↔️", key="swap_btn"):
+            s_red = s_red_str.rsplit(" (", 1)[0]; s_blue = s_blue_str.rsplit(" (", 1)[0]
+            idx_r = st.session_state.match_squad[st.session_state.match_squad["Name"] == s_red].index[0]
+            idx_b = st.session_state.match_squad[st.session_state.match_squad["Name"] == s_blue].index[0]
+            st.session_state.match_squad.at[idx_r, "Team"] = "Blue"; st.session_state.match_squad.at[idx_b, "Team"] = "Red"
+            st.session_state.transfer_log.append(f"{s_red} (RED) ↔ {s_blue} (BLUE)")
+            st.session_state.red_ovr = int(st.session_state.match_squad[st.session_state.match_squad["Team"] == "Red"]['Power'].mean())
+            st.session_state.blue_ovr = int(st.session_state.match_squad[st.session_state.match_squad["Team"] == "Blue"]['Power'].mean())
+            speculate_commentary()
+            st.rerun()  # The tactical board reads match_squad too
+    if st.session_state.transfer_log:
+        st.write(""); 
+        for log in st.session_state.transfer_log: st.markdown(f"<div class='change-log-item'>{log}</div>", unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def render_tactical_board():
+    # Depends on: match_squad, red_ovr/blue_ovr, match_format, match settings, match_simulation
+    if st.session_state.match_squad.empty:
+        st.info("Generate Squad First"); return
+    match_date, match_time, venue, duration = get_match_settings()
+    reds, blues = split_squad()
+    r_ovr = st.session_state.get('red_ovr', 0); b_ovr = st.session_state.get('blue_ovr', 0)
+
+    dt_obj = datetime.combine(match_date, match_time)
+    date_str = dt_obj.strftime('%d %b %Y')
+    day_venue_str = f"({dt_obj.strftime('%a')} at {venue})"
+    time_str = dt_obj.strftime('%I:%M %p')
+    full_subtitle = f"{date_str} {day_venue_str} | {time_str}"
+    fmt = st.session_state.get('match_format', '9 vs 9')
+    img_png, subs_r, subs_b = render_lineup_png(tuple(reds['Name']), tuple(blues['Name']), fmt, full_subtitle)
+
+    c_pitch, c_subs = st.columns([3, 1])
+    with c_pitch:
+        st.image(img_png, use_container_width=True)
+
+        # 5. BUTTONS
+        fn = f"SMFC_Lineup_{match_date}.png"
+        dt_end = dt_obj + timedelta(minutes=duration)
+        str_time_range = f"{dt_obj.strftime('%I:%M %p')} - {dt_end.strftime('%I:%M %p')}"
+        r_list_txt = "\n".join([p['Name'] for p in reds.to_dict('records')])
+        b_list_txt = "\n".join([p['Name'] for p in blues.to_dict('records')])
+        summary_tab2 = f"Date: {date_str} {day_venue_str}\nTime: {str_time_range}\nGround: {venue}\nScore: Blue 0-0 Red\nCost per player: *\nGpay: *\nLateFee: 50\n\n🔵 *BLUE TEAM* ({b_ovr})\n{b_list_txt}\n\n🔴 *RED TEAM* ({r_ovr})\n{r_list_txt}"
+
+        c_dl, c_copy = st.columns(2)
+        with c_dl:
+            st.download_button(label="📸 DOWNLOAD IMAGE", data=img_png, file_name=fn, mime="image/png", use_container_width=True)
+        with c_copy:
+            share_buttons(summary_tab2, image_png=img_png, file_name=fn, key="share_board")
+
+    with c_subs:
+        st.markdown("<h4 style='color:#FF5722; text-align:center;'>SUBSTITUTES</h4>", unsafe_allow_html=True)
+        if subs_r:
+            st.markdown("<div style='color:#ff4b4b; font-weight:bold;'>🔴 RED SUBS</div>", unsafe_allow_html=True)
+            for s in subs_r: st.markdown(f"- {s}")
+        if subs_b:
+            st.markdown("<div style='color:#1c83e1; font-weight:bold; margin-top:10px;'>🔵 BLUE SUBS</div>", unsafe_allow_html=True)
+            for s in subs_b: st.markdown(f"- {s}")
+
+    # LISTS
+    red_html_t2 = ""; blue_html_t2 = ""
+    for _, p in reds.iterrows(): red_html_t2 += f"<div class='player-card kit-red' style='padding: 4px 8px;'><span class='card-name' style='font-size:12px;'>{p['Name']}</span></div>"
+    for _, p in blues.iterrows(): blue_html_t2 += f"<div class='player-card kit-blue' style='padding: 4px 8px;'><span class='card-name' style='font-size:12px;'>{p['Name']}</span></div>"
+
+    st.write("---")
+    st.markdown(f"""
+    <div style="display: flex; gap: 5px; margin-top: 10px;">
+        <div style="flex: 1; min-width: 0;"><h6 style='color:#ff4b4b; text-align:center; margin:0 0 5px 0;'>RED ({r_ovr})</h6>{red_html_t2}</div>
+        <div style="flex: 1; min-width: 0;"><h6 style='color:#1c83e1; text-align:center; margin:0 0 5px 0;'>BLUE ({b_ovr})</h6>{blue_html_t2}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # MATCH SIMULATION
+    st.write("---")
+    if st.button("🔮 SIMULATE MATCH SCENARIO"):
+        if st.session_state.get('match_sim_job'): st.session_state.match_sim_job.cancel()
+        # Usually already generated in the background when the squad was set
+        job = claim_commentary(reds, blues)
+        if job is None:
+            r_names = [p['Name'] for p in reds.to_dict('records')]
+            b_names = [p['Name'] for p in blues.to_dict('records')]
+            job = get_runner().submit(stream_match_commentary, r_names, b_names, r_ovr, b_ovr, ai_session())
+        st.session_state.match_sim_job = job
+
+    if st.session_state.get('match_sim_job'):
+        render_ai_job('match_sim_job', 'match_simulation', show_commentary, "Commentary Box: Signal Lost! ({status})", "AI is analyzing player stats and generating simulation...")
+    elif st.session_state.match_simulation:
+        show_commentary(st.session_state.match_simulation)
+
+        # --- 📸 GENERATE COMMENTARY IMAGE (MOBILE OPTIMIZED V2) ---
+        # 1. Calculate required height (Aggressive Compactness)
+        wrapped_lines = textwrap.wrap(st.session_state.match_simulation, width=60) # Wider text
+        wrapped_text = "\n".join(wrapped_lines)
+        n_lines = len(wrapped_lines)
+        # Tighter math: Base 2.5 + 0.28 per line. Capped between 4 and 10 inches.
+        dynamic_h = max(4, min(10, 2.5 + (n_lines * 0.28)))
+
+        comm_fig = plt.figure(figsize=(8, dynamic_h))
+        comm_fig.patch.set_facecolor('#0e1117')
+        ax_c = comm_fig.add_subplot(111)
+        ax_c.set_facecolor('#0e1117')
+        ax_c.axis('off')
+
+        # Title & Line (Moved Higher)
+        ax_c.text(0.5, 0.96, "🎙️ MATCH COMMENTARY", color='#FF5722', fontsize=22, ha='center', weight='bold', fontfamily='sans-serif')
+        ax_c.plot([0.1, 0.9], [0.93, 0.93], color='#FF5722', lw=2)
+
+        # Body Text (Smaller Font, Higher Position)
+        ax_c.text(0.5, 0.90, wrapped_text, color='white', fontsize=10, ha='center', va='top', fontfamily='monospace')
+
+        # Footer (Lower Position)
+        ax_c.text(0.5, 0.015, "Generated by SMFC Manager Pro", color='#555', fontsize=8, ha='center')
+
+        # Download Button
+        buf_c = io.BytesIO()
+        comm_fig.savefig(buf_c, format='png', bbox_inches='tight', dpi=150, facecolor='#0e1117')
+        buf_c.seek(0)
+
+        st.write("")
+        st.download_button(label="📸 DOWNLOAD COMMENTARY CARD", data=buf_c, file_name=f"SMFC_Commentary_{match_date}.png", mime="image/png", use_container_width=True)
+
+# Speaker -> (bubble classes, avatar), matched on any part of the speaker's name
+SPEAKER_STYLES = {
+    "kaarthumbi": ("char-kaarthumbi", "🐘"),
+    "bellary": ("char-bellary guest-style", "😎"),
+    "induchoodan": ("char-induchoodan guest-style", "🔥"),
+    "appukuttan": ("char-appukuttan guest-style", "🥋"),
+    "ponjikkara": ("char-ponjikkara guest-style", "🤪"),
+}
+GUEST_STYLE = ("guest-style", "👤")
+SPEAKER_RE = re.compile("|".join(SPEAKER_STYLES))
+
+def speaker_style(name):
+    match = SPEAKER_RE.search(name.lower())
+    return SPEAKER_STYLES[match.group(0)] if match else GUEST_STYLE
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def chat_html(text):
+    # Whole transcript -> one HTML fragment, parsed once per distinct response
+    bubbles = ""
+    for name, msg in parse_transcript(text):
+        char_class, avatar = speaker_style(name)
+        bubbles += f"""<div class="chat-row {char_class}"><div class="chat-avatar">{avatar}</div><div class="chat-bubble"><div class="chat-name">{html.escape(name.upper())}</div>{html.escape(msg)}</div></div>"""
+    return f"<div class='chat-container'>{bubbles}</div>"
+
+def show_chat(text):
+    st.markdown(chat_html(text), unsafe_allow_html=True)
+
+def show_commentary(text):
+    st.markdown(commentary_html(text), unsafe_allow_html=True)
+
+@st.fragment(run_every=AI_POLL_SECONDS)
+def render_ai_job(job_key, result_key, show, failure_line, waiting):
+    # Polls a background ai_jobs job and shows its text so far (⏰ lines / bubbles as they
+    # stream). Only this fragment reruns while waiting; a full rerun happens once, at the end.
+    job = st.session_state.get(job_key)
+    if job is None: return
+    status = job.poll()
+    # Whole lines only while streaming, so a half-received "Name: Mess" never flashes up
+    lines = job.text if job.done() else job.text.rpartition('\n')[0]
+    if lines.strip(): show(lines)
+    else: st.caption(waiting)
+    if job.done():
+        text = job.text.strip()
+        if status != "done": text = (text + "\n" if text else "") + failure_line.format(status=status)
+        st.session_state[result_key] = text
+        del st.session_state[job_key]
+        st.rerun()
+
+def commentary_html(text):
+    return f"""
+        <div style="background:rgba(0,0,0,0.5); padding:20px; border-radius:10px; border-left: 5px solid #FFD700; margin-top:20px;">
+            <h3 style="color:#FFD700; margin-top:0;">🎙️ MATCH COMMENTARY</h3>
+            <div style="white-space: pre-line; line-height: 1.6; font-family: monospace; font-size: 14px;">
+                {text}
+            </div>
+        </div>
+        """
+
+@st.fragment
+def render_analytics():
+    # Depends on: match_db, master_db['Name'], ai_chat_response, parsed_match_data
+    if 'match_db' in st.session_state and not st.session_state.match_db.empty:
+        df_m = st.session_state.match_db
+        official_names = set(st.session_state.master_db['Name'].unique()) if 'Name' in st.session_state.master_db.columns else set()
+        total_goals = pd.to_numeric(df_m['Score_Blue'], errors='coerce').sum() + pd.to_numeric(df_m['Score_Red'], errors='coerce').sum()
+
+        st.markdown("<div class='ai-box'>", unsafe_allow_html=True)
+        col_avatar, col_title = st.columns([1, 5])
+        with col_avatar:
+            if os.path.exists("kaarthumbi.png"): st.image("kaarthumbi.png", width=60)
+            else: st.markdown("🐘", unsafe_allow_html=True) 
+        with col_title:
+            st.markdown("<div class='ai-title'>KAARTHUMBI'S CORNER</div>", unsafe_allow_html=True)
+
+        user_q = st.text_input("Ask the panel...", key="ai_q", placeholder="E.g. Who played well? What about Gilson?")
+        if st.button("📢 Ask Kaarthumbi"):
+            # Runs on the shared AI pool; the lobby and squad stay clickable meanwhile
+            if st.session_state.get('ai_chat_job'): st.session_state.ai_chat_job.cancel()
+            lb = get_leaderboard(df_m, tuple(sorted(official_names, key=str)))
+            st.session_state.ai_chat_job = get_runner().submit(stream_ai_scout, user_q, lb, df_m, ai_session())
+
+        if st.session_state.get('ai_chat_job'):
+            render_ai_job('ai_chat_job', 'ai_chat_response', show_chat, "Kaarthumbi: Ayyo! The panel walked out ({status}). Ask again!", "Panel is arguing...")
+        elif st.session_state.ai_chat_response:
+            show_chat(st.session_state.ai_chat_response)
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        st.write("---")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("MATCHES", len(df_m)); c2.metric("GOALS", int(total_goals)); c3.metric("PLAYERS", len(official_names))
+        lb = get_leaderboard(df_m, tuple(sorted(official_names, key=str)))
+
+        if not lb.empty:
+            max_m = lb['M'].max(); names_m = ", ".join(lb[lb['M'] == max_m].index.tolist())
+            top_player = lb.iloc[0]; val_w = f"{top_player['Win %']}%"; name_w = lb.index[0]
+            max_l = lb['L'].max(); names_l = ", ".join(lb[lb['L'] == max_l].index.tolist())
+            sp1, sp2, sp3 = st.columns(3)
+            with sp1: st.markdown(f"<div class='spotlight-box' style='border-bottom:4px solid #00C9FF;'><div class='sp-value'>{max_m}</div><div class='sp-title'>COMMITMENT</div><div class='sp-name'>{names_m}</div></div>", unsafe_allow_html=True)
+            with sp2: st.markdown(f"<div class='spotlight-box' style='border-bottom:4px solid #FFD700;'><div class='sp-value'>{val_w}</div><div class='sp-title'>STAR</div><div class='sp-name'>{name_w}</div></div>", unsafe_allow_html=True)
+            with sp3: st.markdown(f"<div class='spotlight-box' style='border-bottom:4px solid #ff4b4b;'><div class='sp-value'>{max_l}</div><div class='sp-title'>LOSSES</div><div class='sp-name'>{names_l}</div></div>", unsafe_allow_html=True)
+
+            st.write("---")
+            for p, r in lb.iterrows(): 
+                st.markdown(f"""<div class='lb-card'><div class='lb-rank'>#{r['Rank']}</div><div class='lb-info'><div class='lb-name'>{p}</div><div class='lb-stats'>{r['M']} Matches • {r['W']} Wins</div></div><div class='lb-form'>{r['Form_Icons']}</div><div class='lb-winrate'>{r['Win %']}%</div></div>""", unsafe_allow_html=True)
+
+        st.write("---")
+        st.markdown("<h4 class='neon-white'>RECENT MATCHES</h4>", unsafe_allow_html=True)
+        history = df_m.sort_values('Date', ascending=False).head(10)
+        recaps = get_recap_store()
+        for _, row in history.iterrows():
+            score_b, score_r = int(row['Score_Blue']), int(row['Score_Red'])
+            b_cls, r_cls, border = "mc-score-draw", "mc-score-draw", "#555"
+            win_txt, lose_txt, win_cls, lose_cls = row['Team_Blue'], row['Team_Red'], "draw-text", "draw-text"
+            if row['Winner'] == "Blue": b_cls, border, win_txt, lose_txt, win_cls, lose_cls = "mc-score-blue", "#1c83e1", row['Team_Blue'], row['Team_Red'], "neon-gold", "dull-grey"
+            elif row['Winner'] == "Red": r_cls, border, win_txt, lose_txt, win_cls, lose_cls = "mc-score-red", "#ff4b4b", row['Team_Red'], row['Team_Blue'], "neon-gold", "dull-grey"
+            st.markdown(f"""<div class='match-card' style='border-left: 4px solid {border};'><div class='mc-left'><div class='mc-date'>{row['Date']} | {row['Venue']}</div><div class='mc-score'><span class='{b_cls}'>BLUE {score_b}</span> - <span class='{r_cls}'>{score_r} RED</span></div></div><div class='mc-right'><div class='{win_cls}'>{win_txt}</div><div class='{lose_cls}'>{lose_txt}</div></div></div>""", unsafe_allow_html=True)
+            recap = recaps.get(match_id(row))
+            if recap:
+                with st.expander("🎙️ Match recap"): st.markdown(recap)
+
+        with st.expander("⚙️ LOG MATCH"):
+            wa_txt = st.text_area("Paste Result")
+            if st.button("Parse"): st.session_state.parsed_match_data = parse_match_log(wa_txt); st.rerun(scope="fragment")
+            if st.session_state.parsed_match_data:
+                pm = st.session_state.parsed_match_data
+                c_d, c_t, c_v = st.columns(3)
+                new_date = c_d.text_input("Date", pm['Date'])
+                new_time = c_t.text_input("Time", pm['Time'])
+                new_venue = c_v.text_input("Venue", pm['Venue'])
+                c_s1, c_s2 = st.columns(2)
+                ns_b = c_s1.number_input("Blue", pm['Score_Blue'])
+                ns_r = c_s2.number_input("Red", pm['Score_Red'])
+                nt_b = st.text_area("Blue Team", pm['Team_Blue'])
+                nt_r = st.text_area("Red Team", pm['Team_Red'])
+                if st.button("Save"):
+                    if st.text_input("Pass", type="password") == st.secrets["passwords"]["admin"]:
+                        new_row = pd.DataFrame([{"Date": new_date, "Score_Blue": ns_b, "Score_Red": ns_r, "Winner": "Blue" if ns_b > ns_r else "Red" if ns_r > ns_b else "Draw", "Team_Blue": nt_b, "Team_Red": nt_r}])
+                        st.session_state.match_db = pd.concat([st.session_state.match_db, new_row], ignore_index=True)
+                        st.session_state.conn.update(worksheet="Match_History", data=st.session_state.match_db)
+                        st.success("Saved!")
 
 # --- MAIN APP ---
 def run_football_app():
-    if 'ui_version' not in st.session_state: st.session_state.ui_version = 0
     if 'checklist_version' not in st.session_state: st.session_state.checklist_version = 0
+    if 'lobby_page' not in st.session_state: st.session_state.lobby_page = 1
     if 'parsed_match_data' not in st.session_state: st.session_state.parsed_match_data = None
     if 'position_changes' not in st.session_state: st.session_state.position_changes = []
     if 'transfer_log' not in st.session_state: st.session_state.transfer_log = []
@@ -51,16 +551,13 @@ def run_football_app():
     st.markdown("<h1 style='text-align:center; font-family:Rajdhani; font-size: 3.5rem; background: -webkit-linear-gradient(45deg, #D84315, #FF5722); -webkit-background-clip: text; -webkit-text-fill-color: transparent;'>SMFC MANAGER PRO</h1>", unsafe_allow_html=True)
     if st.sidebar.button("🔄 Refresh Data"): 
         st.session_state.pop('master_db', None)
-        st.session_state.ui_version += 1
+        st.session_state.checklist_version += 1
         st.rerun()
 
     tab1, tab2, tab3, tab4 = st.tabs(["MATCH LOBBY", "TACTICAL BOARD", "ANALYTICS", "DATABASE"])
 
     # --- TAB 1: LOBBY ---
     with tab1:
-        smfc_n, guest_n, total_n = get_counts()
-        st.markdown(f"""<div class="section-box"><div style="display:flex; justify-content:space-between; align-items:center;"><div style="color:#FF5722; font-weight:bold; font-size:20px; font-family:Rajdhani;">PLAYER POOL</div><div class="badge-box"><div class="badge-smfc">{smfc_n} SMFC</div><div class="badge-guest">{guest_n} GUEST</div><div class="badge-total">{total_n} TOTAL</div></div></div>""", unsafe_allow_html=True)
-        
         with st.expander("📋 PASTE FROM WHATSAPP", expanded=True):
             whatsapp_text = st.text_area("List:", height=150, label_visibility="collapsed", placeholder="Paste list here...")
             if st.button("Select Players", key="btn_select"):
@@ -80,67 +577,20 @@ def run_football_app():
                     for g in new_guests:
                         if g not in current: current.append(g)
                     st.session_state.guest_input_val = ", ".join(current)
-                    st.session_state.ui_version += 1
+                    st.session_state.checklist_version += 1
                     st.toast(f"✅ Found players. {len(new_guests)} guests added!"); st.rerun()
 
-        pos_tabs = st.tabs(["ALL", "FWD", "MID", "DEF"])
-        def render_checklist(df_s, t_n):
-            if df_s.empty or 'Name' not in df_s.columns: return
-            df_s = df_s.sort_values("Name")
-            cols = st.columns(3) 
-            for i, (idx, row) in enumerate(df_s.iterrows()):
-                key_id = f"chk_{idx}_{t_n}_v{st.session_state.ui_version}"
-                cols[i % 3].checkbox(f"{row['Name']}", value=bool(row.get('Selected', False)), key=key_id, on_change=toggle_selection, args=(idx,))
-        
-        with pos_tabs[0]: render_checklist(st.session_state.master_db, "all")
-        with pos_tabs[1]: render_checklist(st.session_state.master_db[st.session_state.master_db['Position'] == 'FWD'], "fwd")
-        with pos_tabs[2]: render_checklist(st.session_state.master_db[st.session_state.master_db['Position'] == 'MID'], "mid")
-        with pos_tabs[3]: render_checklist(st.session_state.master_db[st.session_state.master_db['Position'] == 'DEF'], "def")
-        st.write(""); st.text_input("Guests (Comma separated)", key="guest_input_val"); st.markdown('</div>', unsafe_allow_html=True)
+        render_lobby()
 
         with st.expander("⚙️ MATCH SETTINGS (Date, Time, Venue)", expanded=False):
             c1, c2 = st.columns(2)
-            match_date = c1.date_input("Match Date", datetime.today(), key="match_date_input")
-            match_time = c1.time_input("Kickoff", datetime.now().time(), key="match_time_input")
+            c1.date_input("Match Date", datetime.today(), key="match_date_input")
+            c1.time_input("Kickoff", datetime.now().time(), key="match_time_input")
             venue_opt = c2.selectbox("Venue", ["BFC", "GoatArena", "SportZ", "Other"], key="venue_select")
-            venue = c2.text_input("Venue Name", "Ground", key="venue_text") if venue_opt == "Other" else venue_opt
-            duration = c2.slider("Duration (Mins)", 60, 120, 90, 30, key="duration_slider")
+            if venue_opt == "Other": c2.text_input("Venue Name", "Ground", key="venue_text")
+            c2.slider("Duration (Mins)", 60, 120, 90, 30, key="duration_slider")
             st.session_state.match_format = st.selectbox("Format", ["9 vs 9", "7 vs 7", "6 vs 6", "5 vs 5"], key="fmt_select")
 
-        guests = get_guests_list()
-        if guests:
-            st.write("---"); st.markdown("<h3 style='color:#FFD700; text-align:center; margin-bottom: 15px;'>GUEST SQUAD SETUP</h3>", unsafe_allow_html=True)
-            for g_name in guests:
-                c_name, c_pos, c_lvl = st.columns([3.5, 2, 2.5])
-                with c_name: st.markdown(f"<div class='guest-row-label'>{g_name}</div>", unsafe_allow_html=True)
-                with c_pos: st.selectbox("Pos", ["FWD", "MID", "DEF", "GK"], key=f"g_pos_{g_name}", label_visibility="collapsed")
-                with c_lvl: st.selectbox("Lvl", ["⭐⭐⭐⭐⭐", "⭐⭐⭐⭐", "⭐⭐⭐", "⭐⭐", "⭐"], index=2, key=f"g_lvl_{g_name}", label_visibility="collapsed")
-            st.write("---")
-
-        with st.expander("🛠️ EDIT POSITIONS (Session Only)", expanded=False):
-            selected_players = st.session_state.master_db[st.session_state.master_db['Selected'] == True]
-            if not selected_players.empty:
-                c_p_sel, c_p_pos, c_p_btn = st.columns([3.5, 2, 2.5])
-                with c_p_sel:
-                    p_opts = [f"{row['Name']} ({row['Position']})" for _, row in selected_players.iterrows()]
-                    p_to_edit_str = st.selectbox("Select Player", p_opts, key="edit_pos_player")
-                with c_p_pos: new_pos = st.selectbox("New Position", ["FWD", "MID", "DEF", "GK"], key="edit_pos_new")
-                with c_p_btn:
-                    st.write(""); st.write("")
-                    if st.button("UPDATE POS", key="btn_update_pos"):
-                        p_name_clean = p_to_edit_str.rsplit(" (", 1)[0]
-                        idx = st.session_state.master_db[st.session_state.master_db['Name'] == p_name_clean].index[0]
-                        old_pos = st.session_state.master_db.at[idx, 'Position']
-                        st.session_state.master_db.at[idx, 'Position'] = new_pos
-                        st.session_state.master_db.at[idx, 'Selected'] = True 
-                        st.session_state.ui_version += 1
-                        st.session_state.position_changes.append(f"{p_name_clean}: {old_pos} → {new_pos}")
-                        st.rerun()
-                if st.session_state.position_changes:
-                    st.write(""); 
-                    for change in st.session_state.position_changes: st.markdown(f"<div class='change-log-item'>{change}</div>", unsafe_allow_html=True)
-            else: st.info("Select players first.")
-
         st.write(""); 
         if st.button("⚡ GENERATE SQUAD"):
             if 'Selected' in st.session_state.master_db.columns:
@@ -162,299 +612,55 @@ def run_football_app():
                     st.session_state.red_ovr = int(df_red['Power'].mean()) if not df_red.empty else 0
                     st.session_state.blue_ovr = int(df_blue['Power'].mean()) if not df_blue.empty else 0
                     st.session_state.match_simulation = "" 
+                    speculate_commentary()
                     st.rerun()
             else: st.error("Database offline.")
 
-        if not st.session_state.match_squad.empty:
-            pos_map = {"GK": 0, "DEF": 1, "MID": 2, "FWD": 3}
-            st.session_state.match_squad['Pos_Ord'] = st.session_state.match_squad['Position'].map(pos_map).fillna(4)
-            reds = st.session_state.match_squad[st.session_state.match_squad["Team"] == "Red"].sort_values('Pos_Ord')
-            blues = st.session_state.match_squad[st.session_state.match_squad["Team"] == "Blue"].sort_values('Pos_Ord')
-            r_ovr = st.session_state.get('red_ovr', 0); b_ovr = st.session_state.get('blue_ovr', 0)
-            
-            # --- DISPLAY LINEUPS ---
-            red_html = ""; blue_html = ""
-            for _, p in reds.iterrows(): red_html += f"<div class='player-card kit-red'><span class='card-name'>{p['Name']}</span><span class='pos-badge'>{p['Position']}</span></div>"
-            for _, p in blues.iterrows(): blue_html += f"<div class='player-card kit-blue'><span class='card-name'>{p['Name']}</span><span class='pos-badge'>{p['Position']}</span></div>"
-            st.markdown(f"""
-            <div class="section-box">
-                <div style="color:#FF5722; font-weight:bold; font-size:18px; margin-bottom: 10px;">LINEUPS</div>
-                <div style="display: flex; gap: 8px;">
-                    <div style="flex: 1; min-width: 0;"><h4 style='color:#ff4b4b; text-align:center; margin:0 0 5px 0; font-size:16px;'>RED <span style='font-size:12px; color:#aaa;'>({r_ovr})</span></h4>{red_html}</div>
-                    <div style="width: 1px; background: rgba(255,255,255,0.1);"></div>
-                    <div style="flex: 1; min-width: 0;"><h4 style='color:#1c83e1; text-align:center; margin:0 0 5px 0; font-size:16px;'>BLUE <span style='font-size:12px; color:#aaa;'>({b_ovr})</span></h4>{blue_html}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            dt_match = datetime.combine(match_date, match_time)
-            dt_end = dt_match + timedelta(minutes=duration)
-            str_date = dt_match.strftime('%A, %d %b'); str_time = f"{dt_match.strftime('%I:%M %p')} - {dt_end.strftime('%I:%M %p')}"
-            r_list = "\n".join([p['Name'] for p in reds.to_dict('records')]); b_list = "\n".join([p['Name'] for p in blues.to_dict('records')])
-            summary = f"Date: {str_date}\nTime: {str_time}\nGround: {venue}\nScore: Blue 0-0 Red\nCost per player: *\nGpay: *\nLateFee: 50\n\n🔵 *BLUE TEAM* ({b_ovr})\n{b_list}\n\n🔴 *RED TEAM* ({r_ovr})\n{r_list}"
-            components.html(f"""<textarea id="text_to_copy_v2" style="position:absolute; left:-9999px;">{summary}</textarea><button onclick="var c=document.getElementById('text_to_copy_v2');c.select();document.execCommand('copy');this.innerText='✅ COPIED!';" style="background:linear-gradient(90deg, #FF5722, #FF8A65); color:white; font-weight:800; padding:15px 0; border:none; border-radius:8px; width:100%; cursor:pointer; font-size:16px; margin-top:10px;">📋 COPY TEAM LIST</button>""", height=70)
-            
-            st.write("---"); st.markdown("<h3 style='text-align:center; color:#FF5722;'>TRANSFER WINDOW</h3>", unsafe_allow_html=True)
-            col_tr_red, col_btn, col_tr_blue = st.columns([4, 1, 4])
-            red_opts = [f"{r['Name']} ({r['Position']})" for _, r in reds.iterrows()]; blue_opts = [f"{r['Name']} ({r['Position']})" for _, r in blues.iterrows()]
-            with col_tr_red: s_red_str = st.selectbox("Select Red", red_opts, key="sel_red", label_visibility="collapsed")
-            with col_tr_blue: s_blue_str = st.selectbox("Select Blue", blue_opts, key="sel_blue", label_visibility="collapsed")
-            with col_btn:
-                if st.button("↔️", key="swap_btn"):
-                    s_red = s_red_str.rsplit(" (", 1)[0]; s_blue = s_blue_str.rsplit(" (", 1)[0]
-                    idx_r = st.session_state.match_squad[st.session_state.match_squad["Name"] == s_red].index[0]
-                    idx_b = st.session_state.match_squad[st.session_state.match_squad["Name"] == s_blue].index[0]
-                    st.session_state.match_squad.at[idx_r, "Team"] = "Blue"; st.session_state.match_squad.at[idx_b, "Team"] = "Red"
-                    st.session_state.transfer_log.append(f"{s_red} (RED) ↔ {s_blue} (BLUE)")
-                    st.session_state.red_ovr = int(st.session_state.match_squad[st.session_state.match_squad["Team"] == "Red"]['Power'].mean())
-                    st.session_state.blue_ovr = int(st.session_state.match_squad[st.session_state.match_squad["Team"] == "Blue"]['Power'].mean())
-                    st.rerun()
-            if st.session_state.transfer_log:
-                st.write(""); 
-                for log in st.session_state.transfer_log: st.markdown(f"<div class='change-log-item'>{log}</div>", unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+        render_squad_panel()
 
     # --- TAB 2: PITCH ---
-    with tab2:
-        if not st.session_state.match_squad.empty:
-            c_pitch, c_subs = st.columns([3, 1])
-            with c_pitch:
-                # 1. FIGURE
-                pitch = Pitch(pitch_type='custom', pitch_length=100, pitch_width=100, pitch_color='#43a047', line_color='white')
-                fig, ax = pitch.draw(figsize=(10, 12)) 
-                
-                # 2. HEADER
-                dt_obj = datetime.combine(match_date, match_time)
-                date_str = dt_obj.strftime('%d %b %Y')
-                day_venue_str = f"({dt_obj.strftime('%a')} at {venue})"
-                time_str = dt_obj.strftime('%I:%M %p')
-                full_subtitle = f"{date_str} {day_venue_str} | {time_str}"
-
-                ax.text(50, 108, "SMFC MATCH DAY", color='#FF5722', ha='center', fontsize=26, fontweight='900', fontfamily='sans-serif', path_effects=[path_effects.withStroke(linewidth=3, foreground='black')])
-                ax.text(50, 103, full_subtitle, color='black', ha='center', fontsize=16, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=2, foreground='white')])
-                
-                # 3. PLAYERS
-                def draw_player(player_name, x, y, color):
-                    pitch.scatter(x, y, s=600, marker='h', c=color, edgecolors='white', linewidth=2, ax=ax, zorder=2)
-                    ax.text(x, y-4, player_name, color='black', ha='center', fontsize=10, fontweight='bold', bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="black", lw=1), zorder=3)
-                
-                fmt = st.session_state.get('match_format', '9 vs 9')
-                coords_map = formation_presets.get(fmt, formation_presets['9 vs 9'])
-                r_spots = coords_map.get("RED_COORDS", []); b_spots = coords_map.get("BLUE_COORDS", [])
-                
-                # Recalculate for tab2 scope
-                reds = st.session_state.match_squad[st.session_state.match_squad["Team"] == "Red"].sort_values('Pos_Ord')
-                blues = st.session_state.match_squad[st.session_state.match_squad["Team"] == "Blue"].sort_values('Pos_Ord')
-                r_ovr = st.session_state.get('red_ovr', 0); b_ovr = st.session_state.get('blue_ovr', 0)
-                
-                subs_r = []
-                for i, row in enumerate(reds.itertuples()):
-                    if i < len(r_spots): draw_player(row.Name, r_spots[i][0], r_spots[i][1], '#ff4b4b')
-                    else: subs_r.append(row.Name)
-                subs_b = []
-                for i, row in enumerate(blues.itertuples()):
-                    if i < len(b_spots): draw_player(row.Name, b_spots[i][0], b_spots[i][1], '#1c83e1')
-                    else: subs_b.append(row.Name)
-                
-                # 4. SUBS
-                if subs_r or subs_b:
-                    ax.text(50, -2, "SUBSTITUTES", color='white', ha='center', fontsize=14, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=2, foreground='black')])
-                    r_text = "\n".join(subs_r) if subs_r else "None"
-                    ax.text(25, -5, f"RED SQUAD\n{r_text}", color='#ff4b4b', ha='center', va='top', fontsize=10, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=1, foreground='black')])
-                    b_text = "\n".join(subs_b) if subs_b else "None"
-                    ax.text(75, -5, f"BLUE SQUAD\n{b_text}", color='#1c83e1', ha='center', va='top', fontsize=10, fontweight='bold', path_effects=[path_effects.withStroke(linewidth=1, foreground='black')])
-
-                st.pyplot(fig)
-
-                # 5. BUTTONS
-                fn = f"SMFC_Lineup_{match_date}.png"
-                img_buf = io.BytesIO()
-                fig.savefig(img_buf, format='png', bbox_inches='tight', dpi=150, facecolor='#43a047')
-                img_buf.seek(0)
-                
-                dt_end = dt_obj + timedelta(minutes=duration)
-                str_time_range = f"{dt_obj.strftime('%I:%M %p')} - {dt_end.strftime('%I:%M %p')}"
-                r_list_txt = "\n".join([p['Name'] for p in reds.to_dict('records')])
-                b_list_txt = "\n".join([p['Name'] for p in blues.to_dict('records')])
-                summary_tab2 = f"Date: {date_str} {day_venue_str}\nTime: {str_time_range}\nGround: {venue}\nScore: Blue 0-0 Red\nCost per player: *\nGpay: *\nLateFee: 50\n\n🔵 *BLUE TEAM* ({b_ovr})\n{b_list_txt}\n\n🔴 *RED TEAM* ({r_ovr})\n{r_list_txt}"
-
-                c_dl, c_copy = st.columns(2)
-                with c_dl:
-                    st.download_button(label="📸 DOWNLOAD IMAGE", data=img_buf, file_name=fn, mime="image/png", use_container_width=True)
-                with c_copy:
-                    unique_id = "txt_copy_tab2"
-                    components.html(f"""<textarea id="{unique_id}" style="position:absolute; left:-9999px;">{summary_tab2}</textarea><button onclick="var c=document.getElementById('{unique_id}');c.select();document.execCommand('copy');this.innerText='✅ COPIED!';" style="background:linear-gradient(90deg, #FF5722, #FF8A65); color:white; font-weight:800; padding:0; border:none; border-radius:8px; width:100%; height: 55px; cursor:pointer; font-size:16px;">📋 COPY TEAM LIST</button>""", height=55)
-
-            with c_subs:
-                st.markdown("<h4 style='color:#FF5722; text-align:center;'>SUBSTITUTES</h4>", unsafe_allow_html=True)
-                if subs_r:
-                    st.markdown("<div style='color:#ff4b4b; font-weight:bold;'>🔴 RED SUBS</div>", unsafe_allow_html=True)
-                    for s in subs_r: st.markdown(f"- {s}")
-                if subs_b:
-                    st.markdown("<div style='color:#1c83e1; font-weight:bold; margin-top:10px;'>🔵 BLUE SUBS</div>", unsafe_allow_html=True)
-                    for s in subs_b: st.markdown(f"- {s}")
-            
-            # LISTS
-            red_html_t2 = ""; blue_html_t2 = ""
-            for _, p in reds.iterrows(): red_html_t2 += f"<div class='player-card kit-red' style='padding: 4px 8px;'><span class='card-name' style='font-size:12px;'>{p['Name']}</span></div>"
-            for _, p in blues.iterrows(): blue_html_t2 += f"<div class='player-card kit-blue' style='padding: 4px 8px;'><span class='card-name' style='font-size:12px;'>{p['Name']}</span></div>"
-            
-            st.write("---")
-            st.markdown(f"""
-            <div style="display: flex; gap: 5px; margin-top: 10px;">
-                <div style="flex: 1; min-width: 0;"><h6 style='color:#ff4b4b; text-align:center; margin:0 0 5px 0;'>RED ({r_ovr})</h6>{red_html_t2}</div>
-                <div style="flex: 1; min-width: 0;"><h6 style='color:#1c83e1; text-align:center; margin:0 0 5px 0;'>BLUE ({b_ovr})</h6>{blue_html_t2}</div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # MATCH SIMULATION
-            st.write("---")
-            if st.button("🔮 SIMULATE MATCH SCENARIO"):
-                with st.spinner("AI is analyzing player stats and generating simulation..."):
-                    r_names = [p['Name'] for p in reds.to_dict('records')]
-                    b_names = [p['Name'] for p in blues.to_dict('records')]
-                    st.session_state.match_simulation = simulate_match_commentary(r_names, b_names, r_ovr, b_ovr)
-            
-            if st.session_state.match_simulation:
-                st.markdown(f"""
-                <div style="background:rgba(0,0,0,0.5); padding:20px; border-radius:10px; border-left: 5px solid #FFD700; margin-top:20px;">
-                    <h3 style="color:#FFD700; margin-top:0;">🎙️ MATCH COMMENTARY</h3>
-                    <div style="white-space: pre-line; line-height: 1.6; font-family: monospace; font-size: 14px;">
-                        {st.session_state.match_simulation}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # --- 📸 GENERATE COMMENTARY IMAGE (MOBILE OPTIMIZED V2) ---
-                # 1. Calculate required height (Aggressive Compactness)
-                wrapped_lines = textwrap.wrap(st.session_state.match_simulation, width=60) # Wider text
-                wrapped_text = "\n".join(wrapped_lines)
-                n_lines = len(wrapped_lines)
-                # Tighter math: Base 2.5 + 0.28 per line. Capped between 4 and 10 inches.
-                dynamic_h = max(4, min(10, 2.5 + (n_lines * 0.28)))
-
-                comm_fig = plt.figure(figsize=(8, dynamic_h))
-                comm_fig.patch.set_facecolor('#0e1117')
-                ax_c = comm_fig.add_subplot(111)
-                ax_c.set_facecolor('#0e1117')
-                ax_c.axis('off')
-                
-                # Title & Line (Moved Higher)
-                ax_c.text(0.5, 0.96, "🎙️ MATCH COMMENTARY", color='#FF5722', fontsize=22, ha='center', weight='bold', fontfamily='sans-serif')
-                ax_c.plot([0.1, 0.9], [0.93, 0.93], color='#FF5722', lw=2)
-                
-                # Body Text (Smaller Font, Higher Position)
-                ax_c.text(0.5, 0.90, wrapped_text, color='white', fontsize=10, ha='center', va='top', fontfamily='monospace')
-                
-                # Footer (Lower Position)
-                ax_c.text(0.5, 0.015, "Generated by SMFC Manager Pro", color='#555', fontsize=8, ha='center')
-
-                # Download Button
-                buf_c = io.BytesIO()
-                comm_fig.savefig(buf_c, format='png', bbox_inches='tight', dpi=150, facecolor='#0e1117')
-                buf_c.seek(0)
-                
-                st.write("")
-                st.download_button(label="📸 DOWNLOAD COMMENTARY CARD", data=buf_c, file_name=f"SMFC_Commentary_{match_date}.png", mime="image/png", use_container_width=True)
-
-        else: st.info("Generate Squad First")
+    with tab2: render_tactical_board()
 
     # --- TAB 3: ANALYTICS ---
-    with tab3:
-        if 'match_db' in st.session_state and not st.session_state.match_db.empty:
-            df_m = st.session_state.match_db
-            official_names = set(st.session_state.master_db['Name'].unique()) if 'Name' in st.session_state.master_db.columns else set()
-            total_goals = pd.to_numeric(df_m['Score_Blue'], errors='coerce').sum() + pd.to_numeric(df_m['Score_Red'], errors='coerce').sum()
-            
-            st.markdown("<div class='ai-box'>", unsafe_allow_html=True)
-            col_avatar, col_title = st.columns([1, 5])
-            with col_avatar:
-                if os.path.exists("kaarthumbi.png"): st.image("kaarthumbi.png", width=60)
-                else: st.markdown("🐘", unsafe_allow_html=True) 
-            with col_title:
-                st.markdown("<div class='ai-title'>KAARTHUMBI'S CORNER</div>", unsafe_allow_html=True)
-            
-            user_q = st.text_input("Ask the panel...", key="ai_q", placeholder="E.g. Who played well? What about Gilson?")
-            if st.button("📢 Ask Kaarthumbi"):
-                with st.spinner("Panel is arguing..."):
-                    lb = calculate_leaderboard(df_m, official_names)
-                    ans = ask_ai_scout(user_q, lb, df_m)
-                    st.session_state.ai_chat_response = ans
-            
-            if st.session_state.ai_chat_response:
-                st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
-                lines = st.session_state.ai_chat_response.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if not line: continue
-                    parts = line.split(':', 1)
-                    if len(parts) < 2: continue
-                    
-                    raw_name = parts[0].lower().replace('*', '').strip()
-                    msg = parts[1].strip()
-                    char_class = "guest-style"
-                    avatar = "👤"
-                    name = parts[0].replace('*', '').strip().upper()
-                    
-                    if "kaarthumbi" in raw_name: char_class = "char-kaarthumbi"; avatar = "🐘"
-                    elif "bellary" in raw_name: char_class = "char-bellary guest-style"; avatar = "😎"
-                    elif "induchoodan" in raw_name: char_class = "char-induchoodan guest-style"; avatar = "🔥"
-                    elif "appukuttan" in raw_name: char_class = "char-appukuttan guest-style"; avatar = "🥋"
-                    elif "ponjikkara" in raw_name: char_class = "char-ponjikkara guest-style"; avatar = "🤪"
-                    
-                    st.markdown(f"""<div class="chat-row {char_class}"><div class="chat-avatar">{avatar}</div><div class="chat-bubble"><div class="chat-name">{name}</div>{msg}</div></div>""", unsafe_allow_html=True)
-                st.markdown("</div>", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-            
-            st.write("---")
-            c1, c2, c3 = st.columns(3)
-            c1.metric("MATCHES", len(df_m)); c2.metric("GOALS", int(total_goals)); c3.metric("PLAYERS", len(official_names))
-            lb = calculate_leaderboard(df_m, official_names)
-            
-            if not lb.empty:
-                max_m = lb['M'].max(); names_m = ", ".join(lb[lb['M'] == max_m].index.tolist())
-                top_player = lb.iloc[0]; val_w = f"{top_player['Win %']}%"; name_w = lb.index[0]
-                max_l = lb['L'].max(); names_l = ", ".join(lb[lb['L'] == max_l].index.tolist())
-                sp1, sp2, sp3 = st.columns(3)
-                with sp1: st.markdown(f"<div class='spotlight-box' style='border-bottom:4px solid #00C9FF;'><div class='sp-value'>{max_m}</div><div class='sp-title'>COMMITMENT</div><div class='sp-name'>{names_m}</div></div>", unsafe_allow_html=True)
-                with sp2: st.markdown(f"<div class='spotlight-box' style='border-bottom:4px solid #FFD700;'><div class='sp-value'>{val_w}</div><div class='sp-title'>STAR</div><div class='sp-name'>{name_w}</div></div>", unsafe_allow_html=True)
-                with sp3: st.markdown(f"<div class='spotlight-box' style='border-bottom:4px solid #ff4b4b;'><div class='sp-value'>{max_l}</div><div class='sp-title'>LOSSES</div><div class='sp-name'>{names_l}</div></div>", unsafe_allow_html=True)
-                
-                st.write("---")
-                for p, r in lb.iterrows(): 
-                    st.markdown(f"""<div class='lb-card'><div class='lb-rank'>#{r['Rank']}</div><div class='lb-info'><div class='lb-name'>{p}</div><div class='lb-stats'>{r['M']} Matches • {r['W']} Wins</div></div><div class='lb-form'>{r['Form_Icons']}</div><div class='lb-winrate'>{r['Win %']}%</div></div>""", unsafe_allow_html=True)
-            
-            st.write("---")
-            st.markdown("<h4 class='neon-white'>RECENT MATCHES</h4>", unsafe_allow_html=True)
-            history = df_m.sort_values('Date', ascending=False).head(10)
-            for _, row in history.iterrows():
-                score_b, score_r = int(row['Score_Blue']), int(row['Score_Red'])
-                b_cls, r_cls, border = "mc-score-draw", "mc-score-draw", "#555"
-                win_txt, lose_txt, win_cls, lose_cls = row['Team_Blue'], row['Team_Red'], "draw-text", "draw-text"
-                if row['Winner'] == "Blue": b_cls, border, win_txt, lose_txt, win_cls, lose_cls = "mc-score-blue", "#1c83e1", row['Team_Blue'], row['Team_Red'], "neon-gold", "dull-grey"
-                elif row['Winner'] == "Red": r_cls, border, win_txt, lose_txt, win_cls, lose_cls = "mc-score-red", "#ff4b4b", row['Team_Red'], row['Team_Blue'], "neon-gold", "dull-grey"
-                st.markdown(f"""<div class='match-card' style='border-left: 4px solid {border};'><div class='mc-left'><div class='mc-date'>{row['Date']} | {row['Venue']}</div><div class='mc-score'><span class='{b_cls}'>BLUE {score_b}</span> - <span class='{r_cls}'>{score_r} RED</span></div></div><div class='mc-right'><div class='{win_cls}'>{win_txt}</div><div class='{lose_cls}'>{lose_txt}</div></div></div>""", unsafe_allow_html=True)
-
-            with st.expander("⚙️ LOG MATCH"):
-                wa_txt = st.text_area("Paste Result")
-                if st.button("Parse"): st.session_state.parsed_match_data = parse_match_log(wa_txt); st.rerun()
-                if st.session_state.parsed_match_data:
-                    pm = st.session_state.parsed_match_data
-                    c_d, c_t, c_v = st.columns(3)
-                    new_date = c_d.text_input("Date", pm['Date'])
-                    new_time = c_t.text_input("Time", pm['Time'])
-                    new_venue = c_v.text_input("Venue", pm['Venue'])
-                    c_s1, c_s2 = st.columns(2)
-                    ns_b = c_s1.number_input("Blue", pm['Score_Blue'])
-                    ns_r = c_s2.number_input("Red", pm['Score_Red'])
-                    nt_b = st.text_area("Blue Team", pm['Team_Blue'])
-                    nt_r = st.text_area("Red Team", pm['Team_Red'])
-                    if st.button("Save"):
-                        if st.text_input("Pass", type="password") == st.secrets["passwords"]["admin"]:
-                            new_row = pd.DataFrame([{"Date": new_date, "Score_Blue": ns_b, "Score_Red": ns_r, "Winner": "Blue" if ns_b > ns_r else "Red" if ns_r > ns_b else "Draw", "Team_Blue": nt_b, "Team_Red": nt_r}])
-                            st.session_state.match_db = pd.concat([st.session_state.match_db, new_row], ignore_index=True)
-                            st.session_state.conn.update(worksheet="Match_History", data=st.session_state.match_db)
-                            st.success("Saved!")
+    with tab3: render_analytics()
 
     with tab4:
         if st.text_input("Admin Password", type="password") == st.secrets["passwords"]["admin"]: 
-            st.dataframe(st.session_state.master_db)
\ No newline at end of file
+            st.dataframe(st.session_state.master_db)
+            with st.expander("🎙️ SEASON RECAPS"):
+                # Same job as `python -m libraries.ai_recaps`, on a background thread and the batch
+                # rate budget; already stored matches are skipped
+                season = st.text_input("Season (year, blank = all)", key="recap_season")
+                batch = current_recaps()
+                running = batch is not None and not batch.done()
+                if st.button("Generate missing recaps", disabled=running) and configure_batch_llm() is not None:
+                    batch = start_recaps(st.session_state.match_db.copy(), season.strip() or None, store=get_recap_store(), llm=configure_batch_llm())
+                    running = True
+                if running: render_recap_progress()
+                elif batch is not None and batch.status == "error": st.error(f"Recap run failed: {batch.error}")
+                elif batch is not None: st.success(f"{batch.counts['done']} new, {batch.counts['failed']} failed, {batch.counts['skipped']} already stored")
+            with st.expander("📈 AI METRICS"):
+                # Same numbers as `python -m libraries.ai_metrics`; the log is re-read at most every 30s
+                c1, c2 = st.columns(2)
+                hours = c1.selectbox("Window", [1, 24, 24 * 7, 24 * 30], index=1, format_func=lambda h: f"Last {h}h" if h < 48 else f"Last {h // 24} days", key="ai_metrics_hours")
+                by = c2.selectbox("Group by", ["feature", "session", "provider"], key="ai_metrics_by")
+                rows = get_ai_metrics(hours)
+                if not rows: st.info("No AI calls logged in this window yet.")
+                else:
+                    st.caption(f"{len(rows)} requests · token counts are estimates (~4 chars each)")
+                    st.dataframe(pd.DataFrame(summarize(rows, by)), hide_index=True, use_container_width=True)
+                    errors = recent_errors(rows)
+                    if errors:
+                        err_df = pd.DataFrame(errors)[['at', 'feature', 'session', 'provider', 'error']]
+                        err_df['at'] = pd.to_datetime(err_df['at'], unit='s')
+                        st.dataframe(err_df, hide_index=True, use_container_width=True)
+                # Live process state: job pool, the scout's answer cache and the shared client
+                runner = get_runner().stats()
+                c1, c2, c3, c4 = st.columns(4)
+                c1.metric("In flight", runner['in_flight'], f"{runner['queued']} queued", delta_color="off")
+                c2.metric("Scout cache hits", SCOUT_CACHE.hits, f"{SCOUT_CACHE.misses} misses", delta_color="off")
+                llm = configure_llm()
+                if llm is not None:
+                    client = llm.stats()
+                    c3.metric("Retries", client['retries'], f"{client['rate_limited']} rate limited", delta_color="off")
+                    c4.metric("First chunk p95", f"{client['first_chunk_p95_s'] or 0:.1f}s", f"total p95 {client['total_p95_s'] or 0:.1f}s", delta_color="off")
\ No newline at end of file
@@ -0,0 +1,179 @@
+# libraries/market_alerts.py
+# Dip alerts, evaluated for the whole universe in one vectorized pass per data refresh.
+# Runs headless (cron / systemd timer / a loop) without Streamlit:
+#   python -m libraries.market_alerts --once
+#   python -m libraries.market_alerts --interval 600
+import argparse
+import json
+import os
+import time
+import urllib.request
+import warnings
+from datetime import datetime
+from email.message import EmailMessage
+
+import numpy as np
+import pandas as pd
+
+try:
+    from libraries import market_data
+    from libraries.market_analytics import WINDOW_MAP, close_matrix, compute_window_matrix
+except ImportError:
+    import market_data
+    from market_analytics import WINDOW_MAP, close_matrix, compute_window_matrix
+
+RULES_PATH = os.environ.get("SMFC_DIP_ALERTS", os.path.join(market_data.ROOT_DIR, "config", "dip_alerts.csv"))
+ALERT_DIR = os.environ.get("SMFC_ALERT_DIR", os.path.join(market_data.ROOT_DIR, "data", "alerts"))
+ALERT_COOLDOWN = 24 * 3600
+MOVING_AVERAGES = (20, 50, 200)
+REPORT_WINDOW = "4W" # drawdown quoted in every alert, whatever the rule looked at
+
+# --- 📐 FEATURES ---
+# One row per ticker, one column per thing a rule can mention: <metric>_<window> for every
+# window-matrix metric (drawdown_4W, return_1W, max_drawdown_1Y, zscore_3M, ...) plus
+# curr and the moving averages ma20 / ma50 / ma200.
+
+def build_features(histories, window_map=WINDOW_MAP):
+    matrix = compute_window_matrix(histories, window_map)
+    features = matrix.copy()
+    features.columns = [f"{metric}_{window}" for window, metric in matrix.columns]
+    tickers, arr = close_matrix(histories, max(MOVING_AVERAGES))
+    if not tickers: return features
+    features["curr"] = arr[:, -1]
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for n in MOVING_AVERAGES:
+            # NaN until a ticker has n bars, so MA rules just don't match young listings
+            features[f"ma{n}"] = np.where(np.isnan(arr[:, -n]), np.nan, np.nanmean(arr[:, -n:], axis=1))
+    return features
+
+# --- 📏 RULES ---
+# config/dip_alerts.csv: Name,Rule with Rule a pandas expression over the feature columns,
+# e.g. "drawdown_4W < -8" or "return_1W < -5 and curr < ma50".
+
+def load_rules(path=None):
+    try: rules = pd.read_csv(path or RULES_PATH, dtype=str).dropna(subset=["Name", "Rule"])
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Alert Rules Error: {e}")
+        return []
+    return list(zip(rules["Name"].str.strip(), rules["Rule"].str.strip()))
+
+def evaluate_rules(features, rules):
+    # -> DataFrame of (rule, ticker) hits; each rule is one DataFrame.eval over all tickers
+    hits = []
+    for name, expr in rules:
+        try: mask = features.eval(expr)
+        except Exception as e:
+            print(f"Alert Rule Error ({name}): {e}")
+            continue
+        for ticker in features.index[mask.fillna(False).astype(bool)]:
+            hits.append({"rule": name, "expr": expr, "ticker": ticker})
+    return pd.DataFrame(hits, columns=["rule", "expr", "ticker"])
+
+# --- 🔁 DEDUP ---
+# A (rule, ticker) pair fires once, then stays quiet while it keeps matching (up to the
+# cooldown). It re-arms as soon as the condition clears.
+
+def load_state(path):
+    try:
+        with open(path) as f: return json.load(f)
+    except (OSError, ValueError): return {}
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f: json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+def dedupe(hits, state, now=None, cooldown=ALERT_COOLDOWN):
+    # -> (hits worth sending, new state). The state only keeps pairs that still match.
+    now = now or time.time()
+    keys = [f"{r}|{t}" for r, t in zip(hits["rule"], hits["ticker"])]
+    due = [now - state.get(k, 0) >= cooldown for k in keys]
+    new_state = {k: now if d else state[k] for k, d in zip(keys, due)}
+    return hits[np.array(due, dtype=bool)], new_state
+
+# --- 📣 SINKS ---
+# Anything with send(alerts) where alerts is a list of dicts (rule, expr, ticker, name, ...).
+
+class LogSink:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(ALERT_DIR, "alerts.log")
+
+    def send(self, alerts):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            for a in alerts:
+                f.write(f"{a['time']}\t{a['rule']}\t{a['ticker']}\t{a['name']}\tdrawdown {a['drawdown']:.1f}%\t{a['expr']}\n")
+
+class WebhookSink:
+    # POSTs the batch as JSON when a url is given; otherwise drops the exact payload into
+    # an outbox folder, which doubles as a local stub for wiring up a real endpoint later
+    def __init__(self, url=None, outbox=None, timeout=5):
+        self.url = url
+        self.outbox = outbox or os.path.join(ALERT_DIR, "webhook_outbox")
+        self.timeout = timeout
+
+    def send(self, alerts):
+        payload = json.dumps({"source": "dip_hunter", "alerts": alerts}, default=str).encode()
+        if self.url:
+            req = urllib.request.Request(self.url, data=payload, headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=self.timeout): return
+        os.makedirs(self.outbox, exist_ok=True)
+        with open(os.path.join(self.outbox, f"{time.time_ns()}.json"), "wb") as f: f.write(payload)
+
+class EmailFileSink:
+    # Writes a ready-to-send .eml per batch instead of talking to an SMTP server
+    def __init__(self, folder=None, to="alerts@localhost", sender="dip-hunter@localhost"):
+        self.folder = folder or os.path.join(ALERT_DIR, "mail")
+        self.to = to
+        self.sender = sender
+
+    def send(self, alerts):
+        msg = EmailMessage()
+        msg["Subject"] = f"📉 Dip Hunter: {len(alerts)} alert{'s' if len(alerts) != 1 else ''}"
+        msg["From"], msg["To"] = self.sender, self.to
+        msg.set_content("\n".join(f"- {a['name']} ({a['ticker']}): {a['rule']} · drawdown {a['drawdown']:.1f}%" for a in alerts))
+        os.makedirs(self.folder, exist_ok=True)
+        with open(os.path.join(self.folder, f"{time.time_ns()}.eml"), "wb") as f: f.write(bytes(msg))
+
+def default_sinks():
+    return [LogSink(), WebhookSink(os.environ.get("SMFC_ALERT_WEBHOOK")), EmailFileSink()]
+
+# --- 🚨 RUN ---
+
+def run_alerts(histories, rules, sinks, universe=None, window_map=WINDOW_MAP, state_path=None, now=None):
+    # One evaluation round: features -> rule hits -> dedup -> every sink. Returns the alerts sent.
+    state_path = state_path or os.path.join(ALERT_DIR, "_state.json")
+    features = build_features(histories, window_map)
+    fresh, state = dedupe(evaluate_rules(features, rules), load_state(state_path), now)
+    save_state(state_path, state)
+    if fresh.empty: return []
+    names = dict(zip(universe["Ticker"], universe["Name"])) if universe is not None else {}
+    stamp = datetime.now().strftime('%Y-%m-%d %H:%M')
+    drawdown = features.get(f"drawdown_{REPORT_WINDOW}", pd.Series(np.nan, index=features.index))
+    alerts = [{
+        **row, "time": stamp, "name": names.get(row["ticker"], row["ticker"]),
+        "drawdown": float(drawdown[row["ticker"]]),
+    } for row in fresh.to_dict("records")]
+    for sink in sinks:
+        # One broken sink shouldn't swallow the alert everywhere else
+        try: sink.send(alerts)
+        except Exception as e: print(f"Alert Sink Error ({type(sink).__name__}): {e}")
+    return alerts
+
+def run_once(sinks=None, rules_path=None):
+    universe = market_data.load_universe()
+    histories = market_data.update_store(universe["Ticker"])
+    return run_alerts(histories, load_rules(rules_path), sinks or default_sinks(), universe)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate Dip Hunter alert rules against the price store.")
+    parser.add_argument("--once", action="store_true", help="Run a single round and exit")
+    parser.add_argument("--interval", type=int, default=600, help="Seconds between rounds when looping")
+    parser.add_argument("--rules", default=None, help=f"Rules CSV (default {RULES_PATH})")
+    args = parser.parse_args()
+    while True:
+        alerts = run_once(rules_path=args.rules)
+        print(f"{datetime.now():%H:%M:%S} {len(alerts)} new alert(s)")
+        if args.once: break
+        time.sleep(args.interval)
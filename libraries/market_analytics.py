@@ -0,0 +1,85 @@
+# libraries/market_analytics.py
+import numpy as np
+import pandas as pd
+
+# --- 📐 WINDOW MATRIX ---
+# Computed once per data refresh; the page only looks rows up when the timeframe changes.
+
+# Bars in the window (trading days back + today); long windows come from the 5y store
+WINDOW_MAP = {'1D': 2, '2D': 3, '3D': 4, '4D': 5, '1W': 6, '2W': 11, '3W': 16, '4W': 23, '3M': 64, '6M': 127, '1Y': 253, '5Y': 1261}
+
+def close_matrix(histories, depth):
+    # tickers x depth array of each ticker's last `depth` closes, right-aligned and NaN-padded,
+    # so column -n is "n bars ago" for every ticker regardless of history length
+    tickers = [t for t, df in histories.items() if df is not None and len(df) >= 2]
+    arr = np.full((len(tickers), depth), np.nan)
+    for i, t in enumerate(tickers):
+        closes = histories[t]['Close'].to_numpy(dtype=float)[-depth:]
+        arr[i, depth - len(closes):] = closes
+    return tickers, arr
+
+def compute_window_matrix(histories, window_map):
+    # Columns are (window, metric): curr/high/low, return/drawdown/max_drawdown (percentages) and zscore
+    tickers, arr = close_matrix(histories, max(window_map.values()))
+    rows = np.arange(len(tickers))
+    curr = arr[:, -1]
+    frames = {}
+    for label, days in window_map.items():
+        win = arr[:, -days:]
+        high = np.nanmax(win, axis=1)
+        low = np.nanmin(win, axis=1)
+        # Same as df.tail(days).iloc[0]: the first bar actually inside the window
+        start = win[rows, np.argmax(~np.isnan(win), axis=1)]
+        # Worst peak-to-trough inside the window, from a single running-high pass
+        max_dd = np.nanmin(win / np.fmax.accumulate(win, axis=1) - 1, axis=1) * 100
+        # How unusual today's close is for the window (negative = cheap vs its own recent range)
+        mean, std = np.nanmean(win, axis=1), np.nanstd(win, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zscore = np.where(std > 0, (curr - mean) / std, 0.0)
+        frames[label] = pd.DataFrame({
+            "curr": curr, "high": high, "low": low,
+            "return": (curr - start) / start * 100,
+            "drawdown": (curr - high) / high * 100,
+            "max_drawdown": max_dd,
+            "zscore": zscore,
+        }, index=tickers)
+    return pd.concat(frames, axis=1)
+
+def rank_dips(window_view, by="drawdown"):
+    # Tickers ordered deepest dip first (most negative drawdown / z-score); no-data rows drop out
+    return window_view[by].dropna().sort_values(kind="stable").index.tolist()
+
+def apply_intraday(window_view, live):
+    # Folds a live session (last/high/low per ticker) into one window of the daily matrix:
+    # O(tickers) per poll instead of recomputing the history. zscore stays on daily closes.
+    view = window_view.copy()
+    live = live.reindex(view.index).dropna(subset=["last"]) if not live.empty else live
+    if live.empty: return view
+    idx = live.index
+    prev = view.loc[idx]
+    start = prev["curr"] / (1 + prev["return"] / 100)
+    curr = live["last"].astype(float)
+    high = np.fmax(prev["high"], live["high"].astype(float))
+    low = np.fmin(prev["low"], live["low"].astype(float))
+    drawdown = (curr - high) / high * 100
+    view.loc[idx, "curr"] = curr
+    view.loc[idx, "high"] = high
+    view.loc[idx, "low"] = low
+    view.loc[idx, "return"] = (curr - start) / start * 100
+    view.loc[idx, "drawdown"] = drawdown
+    view.loc[idx, "max_drawdown"] = np.fmin(prev["max_drawdown"], drawdown)
+    return view
+
+# --- 📉 ROLLING EXTREMA ENGINE ---
+# Everything below is a single pass per column (cummax / pandas' O(n) rolling max), so
+# multi-year daily histories for the whole universe stay cheap.
+
+def wide_closes(histories):
+    # dates x tickers, forward-filled over days a ticker didn't trade
+    closes = {t: df['Close'] for t, df in histories.items() if df is not None and not df.empty}
+    if not closes: return pd.DataFrame()
+    return pd.DataFrame(closes).sort_index().ffill()
+
+def rolling_high(closes, window=None):
+    # window=None -> running high since the first bar; otherwise the trailing `window` bars
+    return closes.cummax() if window is None else closes.rolling(window, min_periods=1).max()
@@ -0,0 +1,118 @@
+# libraries/market_backtest.py
+# Does "buy the dip" actually pay? Threshold dip-buy rules simulated over the price store:
+# buy at the close when a ticker is `threshold`% under its `lookback`-bar high, hold for
+# `hold` bars (a fresh signal while holding extends the hold). Every rule in the grid and
+# every ticker run as one set of NumPy array ops per (lookback, hold) pair.
+#   python -m libraries.market_backtest --workers 4 --top 15
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+try:
+    from libraries import market_data
+    from libraries.market_analytics import wide_closes, rolling_high
+except ImportError:
+    import market_data
+    from market_analytics import wide_closes, rolling_high
+
+# Medium Dip starts at 3%, CRASH at 10% (same bands as the page legend)
+THRESHOLDS = (3, 5, 8, 10, 15)
+LOOKBACKS = (20, 63, 126, 252)
+HOLDS = (5, 21, 63, 126, 252)
+TRADING_DAYS = 252
+
+def shift_bars(arr, n):
+    # arr shifted n bars later along axis 1, zero/False-padded at the start
+    if n >= arr.shape[1]: return np.zeros_like(arr)
+    pad = np.zeros(arr.shape[:1] + (n,) + arr.shape[2:], dtype=arr.dtype)
+    return np.concatenate([pad, arr[:, :-n]], axis=1)
+
+def backtest_grid(closes, thresholds=THRESHOLDS, lookbacks=LOOKBACKS, holds=HOLDS):
+    # closes: dates x tickers. Returns one row per (ticker, threshold, lookback, hold) with
+    # cagr / max_drawdown (%), hit_rate (% of entries up after `hold` bars), trades, exposure.
+    values = closes.to_numpy(dtype=float)
+    raw_rets = values[1:] / values[:-1] - 1
+    rets = np.nan_to_num(raw_rets)
+    # Each ticker is annualised over the bars it actually traded
+    years = np.maximum((~np.isnan(raw_rets)).sum(axis=0), 1) / TRADING_DAYS
+    d = np.asarray(thresholds, dtype=float)[:, None, None]
+    frames = []
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for lookback in lookbacks:
+            dd = (values / rolling_high(closes, lookback).to_numpy(dtype=float) - 1) * 100
+            signal = dd[None] <= -d # thresholds x dates x tickers
+            fired = np.cumsum(signal, axis=1)
+            for hold in holds:
+                # Holding on bar t if a signal fired on any of the last `hold` bars (t included)
+                active = (fired - shift_bars(fired, hold)) > 0
+                strat = active[:, :-1] * rets[None]
+                equity = np.cumprod(1 + strat, axis=1)
+                cagr = (equity[:, -1] ** (1 / years) - 1) * 100
+                max_dd = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1) * 100
+                # A trade starts where a signal fires while flat; it "hits" if it is up `hold` bars later
+                entries = signal & ~shift_bars(active, 1)
+                fwd = np.full_like(values, np.nan)
+                fwd[:-hold] = values[hold:] / values[:-hold] - 1
+                scored = entries & ~np.isnan(fwd)[None]
+                trades = scored.sum(axis=1)
+                hit_rate = np.where(trades > 0, (scored & (fwd > 0)[None]).sum(axis=1) / np.maximum(trades, 1) * 100, np.nan)
+                for k, threshold in enumerate(thresholds):
+                    frames.append(pd.DataFrame({
+                        "ticker": closes.columns, "threshold": threshold, "lookback": lookback, "hold": hold,
+                        "cagr": cagr[k], "max_drawdown": max_dd[k], "hit_rate": hit_rate[k],
+                        "trades": trades[k], "exposure": active[k, :-1].mean(axis=0) * 100,
+                    }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def buy_and_hold(closes):
+    # Per-ticker benchmark over the same bars
+    values = closes.to_numpy(dtype=float)
+    first = closes.bfill().iloc[0].to_numpy(dtype=float)
+    years = np.maximum(closes.notna().sum().to_numpy() - 1, 1) / TRADING_DAYS
+    equity = values / first
+    peak = np.fmax.accumulate(equity, axis=0)
+    return pd.DataFrame({
+        "bh_cagr": ((values[-1] / first) ** (1 / years) - 1) * 100,
+        "bh_max_drawdown": np.nanmin(equity / peak - 1, axis=0) * 100,
+    }, index=closes.columns)
+
+def run_backtest(histories, workers=1, **grid):
+    # Tickers are independent, so big universes are split column-wise across a process pool
+    closes = wide_closes(histories)
+    if closes.empty: return pd.DataFrame()
+    chunks = [closes.iloc[:, i::workers] for i in range(min(workers, closes.shape[1]))]
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool: parts = list(pool.map(partial(backtest_grid, **grid), chunks))
+    else:
+        parts = [backtest_grid(closes, **grid)]
+    results = pd.concat(parts, ignore_index=True)
+    return results.join(buy_and_hold(closes), on="ticker")
+
+def summarize(results, top=10):
+    # Parameter sets ranked by median CAGR across tickers
+    summary = results.groupby(["threshold", "lookback", "hold"]).agg(
+        cagr=("cagr", "median"), max_drawdown=("max_drawdown", "median"), hit_rate=("hit_rate", "median"),
+        trades=("trades", "sum"), exposure=("exposure", "median"), bh_cagr=("bh_cagr", "median"),
+    )
+    return summary.sort_values("cagr", ascending=False).head(top)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest threshold dip-buy rules over the Dip Hunter universe.")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to split tickers across")
+    parser.add_argument("--top", type=int, default=10, help="Parameter sets to print")
+    parser.add_argument("--out", default=None, help="Write the full ticker x parameter table to this CSV")
+    args = parser.parse_args()
+    universe = market_data.load_universe()
+    histories = market_data.update_store(universe["Ticker"])
+    start = time.perf_counter()
+    results = run_backtest(histories, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    n_sets = len(THRESHOLDS) * len(LOOKBACKS) * len(HOLDS)
+    print(f"{results['ticker'].nunique() if not results.empty else 0} tickers x {n_sets} parameter sets in {elapsed:.2f}s")
+    if not results.empty:
+        print(summarize(results, args.top).round(1).to_string())
+        if args.out: results.to_csv(args.out, index=False)
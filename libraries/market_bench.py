@@ -0,0 +1,58 @@
+# libraries/market_bench.py
+# Reproducible Dip Hunter pipeline timings against the offline provider:
+#   python -m libraries.market_bench --latency 0.3 --failure-rate 0.05 --runs 5
+#   python -m libraries.market_bench --symbols 1000   (synthetic universe, top-N ranking path)
+import argparse
+import statistics
+import tempfile
+import time
+
+try:
+    from libraries import market_data
+    from libraries.market_analytics import compute_window_matrix, rank_dips
+    from libraries.market_lib import ASSETS, WINDOW_MAP, METRIC_COLS, DIP_PAGE_SIZE, render_asset_card
+except ImportError:
+    import market_data
+    from market_analytics import compute_window_matrix, rank_dips
+    from market_lib import ASSETS, WINDOW_MAP, METRIC_COLS, DIP_PAGE_SIZE, render_asset_card
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+def run_bench(latency=0.0, failure_rate=0.0, runs=3, seed=0, window="1W", symbols=0):
+    market_data.set_provider(market_data.LocalProvider(latency=latency, failure_rate=failure_rate, seed=seed))
+    if symbols: names = {f"SYN{i:04d}.NS": f"Synthetic {i}" for i in range(symbols)}
+    else: names = {t: n for tokens in ASSETS.values() for n, t in tokens.items()}
+    tickers = list(names)
+    timings = {"cold_fetch": [], "warm_fetch": [], "incremental_fetch": [], "matrix": [], "cold_snapshot": [], "rank": [], "render": []}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as store:
+            market_data.PRICE_STORE_DIR = store
+            _, t = timed(lambda: market_data.update_store(tickers)); timings["cold_fetch"].append(t)
+            histories, t = timed(lambda: market_data.update_store(tickers)); timings["warm_fetch"].append(t)
+            _, t = timed(lambda: market_data.update_store(tickers, max_age=0)); timings["incremental_fetch"].append(t)
+            matrix, t = timed(lambda: compute_window_matrix(histories, WINDOW_MAP)); timings["matrix"].append(t)
+            # What a cold page shows first: the last matrix, before any bars are read
+            market_data.save_snapshot(matrix)
+            _, t = timed(market_data.load_snapshot); timings["cold_snapshot"].append(t)
+            view = matrix[window]
+            ranked, t = timed(lambda: rank_dips(view)[:DIP_PAGE_SIZE]); timings["rank"].append(t)
+            _, t = timed(lambda: "".join(
+                render_asset_card(names[tk], view.loc[tk, METRIC_COLS], "₹", window) for tk in ranked
+            )); timings["render"].append(t)
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Dip Hunter fetch + render pipeline offline.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per simulated round-trip")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of symbols dropped per fetch")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--symbols", type=int, default=0, help="Use N synthetic tickers instead of the configured assets")
+    args = parser.parse_args()
+    results = run_bench(args.latency, args.failure_rate, args.runs, args.seed, symbols=args.symbols)
+    print(f"{'stage':<20}{'median ms':>12}{'min ms':>12}")
+    for stage, values in results.items():
+        print(f"{stage:<20}{statistics.median(values) * 1000:>12.1f}{min(values) * 1000:>12.1f}")
@@ -0,0 +1,507 @@
+# libraries/market_data.py
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- ⚡ BATCH DATA ENGINE ---
+# No Streamlit in here, so the same engine can be cached by the page or used from scripts.
+MAX_FETCH_WORKERS = 8
+FETCH_TIMEOUT = 5
+BATCH_CHUNK = 200
+
+def fetch_one(ticker, period="3mo", start=None, interval="1d"):
+    kwargs = {"start": start} if start else {"period": period}
+    try:
+        df = yf.Ticker(ticker).history(interval=interval, timeout=3, **kwargs)
+        return None if df.empty else df
+    except Exception:
+        return None
+
+def split_download(raw, tickers):
+    out = {}
+    if raw is None or raw.empty: return out
+    if isinstance(raw.columns, pd.MultiIndex):
+        available = set(raw.columns.get_level_values(0))
+        for t in tickers:
+            if t not in available: continue
+            df = raw[t].dropna(how='all')
+            if not df.empty: out[t] = df
+    elif len(tickers) == 1:
+        df = raw.dropna(how='all')
+        if not df.empty: out[tickers[0]] = df
+    return out
+
+def fetch_batch(tickers, period="3mo", start=None, interval="1d"):
+    # One multi-ticker download for the whole universe; anything it misses gets a
+    # bounded parallel per-ticker retry. Failed symbols come back as None.
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers: return {}
+    kwargs = {"start": start} if start else {"period": period}
+
+    def download(chunk):
+        try:
+            raw = yf.download(chunk, interval=interval, group_by="ticker", auto_adjust=True, threads=True, progress=False, timeout=FETCH_TIMEOUT, **kwargs)
+            return split_download(raw, chunk)
+        except Exception as e:
+            print(f"Batch Fetch Error: {e}")
+            return {}
+
+    # Large universes go out as a few concurrent chunked downloads instead of one huge request
+    chunks = [tickers[i:i + BATCH_CHUNK] for i in range(0, len(tickers), BATCH_CHUNK)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as pool:
+        for part in pool.map(download, chunks): results.update(part)
+
+    missing = [t for t in tickers if t not in results]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(missing))) as pool:
+            for t, df in zip(missing, pool.map(lambda t: fetch_one(t, period, start, interval), missing)):
+                results[t] = df
+    return results
+
+# --- 🔌 PRICE PROVIDERS ---
+# Anything with fetch(tickers, period, start, interval) -> {ticker: DataFrame or None}.
+# The store and the page only talk to get_provider(), so tests, demos and benchmarks can
+# swap in LocalProvider (SMFC_PRICE_PROVIDER=local) without touching the network.
+
+class YFinanceProvider:
+    name = "yfinance"
+
+    def fetch(self, tickers, period="3mo", start=None, interval="1d"):
+        return fetch_batch(tickers, period=period, start=start, interval=interval)
+
+class LocalProvider:
+    # Replays recorded bars from fixture_dir (same CSV layout as the price store), or
+    # deterministic synthetic random walks for tickers without a fixture. latency is slept
+    # once per fetch (one "round-trip"); failure_rate / fail_tickers drop symbols to None.
+    name = "local"
+    PERIOD_BARS = {"d": 1, "wk": 5, "mo": 21, "y": 252}
+    SERIES_CACHE = 2048 # synthetic tickers kept per provider (~200 KB of bars each)
+    _dates = {} # (end, bars) -> business-day index, shared by every provider
+
+    def __init__(self, fixture_dir=None, latency=0.0, failure_rate=0.0, fail_tickers=(), seed=0, end="2025-12-31", synthetic=True):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_tickers = set(fail_tickers)
+        self.seed = seed
+        self.end = pd.Timestamp(end)
+        self.synthetic = synthetic
+        self.calls = 0
+        # Generated series per ticker (the seed is fixed per provider), most recently used last
+        self.series = OrderedDict()
+        self.lock = threading.Lock()
+
+    def period_bars(self, period):
+        if period == "max": return 252 * 20
+        m = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+        return int(m.group(1)) * self.PERIOD_BARS[m.group(2)] if m else 63
+
+    def synthetic_dates(self):
+        key = (self.end, self.period_bars("max"))
+        if key not in LocalProvider._dates: LocalProvider._dates[key] = pd.bdate_range(end=self.end, periods=key[1], name="Date")
+        return LocalProvider._dates[key]
+
+    def synthetic_bars(self, ticker):
+        # Same ticker + seed -> same series, on any machine. Built once per ticker, so the
+        # stand-in stays cheap next to the engine it is standing in for.
+        with self.lock:
+            if ticker in self.series:
+                self.series.move_to_end(ticker)
+                return self.series[ticker]
+        bars = self.generate_bars(ticker)
+        with self.lock:
+            self.series[ticker] = bars
+            while len(self.series) > self.SERIES_CACHE: self.series.popitem(last=False)
+        return bars
+
+    def generate_bars(self, ticker):
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+        dates = self.synthetic_dates()
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(dates))))
+        spread = np.abs(rng.normal(0, 0.006, len(dates)))
+        return pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.003, len(dates))),
+            "High": close * (1 + spread), "Low": close * (1 - spread), "Close": close,
+            "Volume": rng.integers(10_000, 1_000_000, len(dates)),
+        }, index=dates)
+
+    def synthetic_minutes(self, ticker, now=None):
+        # Today's session as 1m bars continuing from the last daily close; the full session is
+        # drawn up front so repeated polls see the same bars, just more of them as time passes
+        now = now or pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None)
+        day = now.normalize()
+        session = pd.date_range(day + pd.Timedelta(MARKET_OPEN + ":00"), day + pd.Timedelta(MARKET_CLOSE + ":00"), freq="1min", inclusive="left", name="Date")
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), day.toordinal()])
+        close = self.synthetic_bars(ticker)["Close"].iloc[-1] * np.exp(np.cumsum(rng.normal(0, 0.0008, len(session))))
+        spread = np.abs(rng.normal(0, 0.0004, len(session)))
+        bars = pd.DataFrame({
+            "Open": close, "High": close * (1 + spread), "Low": close * (1 - spread), "Close": close,
+            "Volume": rng.integers(100, 10_000, len(session)),
+        }, index=session)
+        return bars[bars.index <= now]
+
+    def load_bars(self, ticker):
+        if self.fixture_dir:
+            path = os.path.join(self.fixture_dir, re.sub(r'[^A-Za-z0-9._-]', '_', ticker) + ".csv")
+            if os.path.exists(path): return pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+        return self.synthetic_bars(ticker) if self.synthetic else None
+
+    def fetch(self, tickers, period="3mo", start=None, interval="1d"):
+        self.calls += 1
+        if self.latency: time.sleep(self.latency)
+        results = {}
+        for t in dict.fromkeys(tickers):
+            roll = random.Random(f"{self.seed}:{t}:{self.calls}").random()
+            intraday = interval.endswith("m")
+            bars = None if t in self.fail_tickers or roll < self.failure_rate else self.synthetic_minutes(t) if intraday else self.load_bars(t)
+            if bars is not None:
+                if start: bars = bars[bars.index >= pd.Timestamp(start)]
+                elif not intraday: bars = bars.tail(self.period_bars(period))
+            results[t] = None if bars is None or bars.empty else bars
+        return results
+
+_provider = None
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        if os.environ.get("SMFC_PRICE_PROVIDER", "yfinance") == "local":
+            _provider = LocalProvider(
+                fixture_dir=os.environ.get("SMFC_PRICE_FIXTURES"),
+                latency=float(os.environ.get("SMFC_PRICE_LATENCY", 0)),
+                failure_rate=float(os.environ.get("SMFC_PRICE_FAILURE_RATE", 0)),
+            )
+        else:
+            _provider = YFinanceProvider()
+    return _provider
+
+def set_provider(provider):
+    global _provider
+    _provider = provider
+
+# --- ⏱️ MARKET HOURS ---
+MARKET_TZ = "Asia/Kolkata"
+MARKET_OPEN, MARKET_CLOSE = "09:15", "15:30"
+
+def market_open(now=None):
+    now = now or pd.Timestamp.now(tz=MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.strftime('%H:%M') < MARKET_CLOSE
+
+# --- 📋 UNIVERSE ---
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UNIVERSE_PATH = os.environ.get("SMFC_DIP_UNIVERSE", os.path.join(ROOT_DIR, "config", "dip_universe.csv"))
+
+def load_universe(path=None, default=None):
+    # Category, Name, Ticker rows from a CSV (hundreds to thousands of symbols is fine);
+    # falls back to a {category: {name: ticker}} dict when the file is missing or unreadable
+    path = path or UNIVERSE_PATH
+    try:
+        universe = pd.read_csv(path, dtype=str)[["Category", "Name", "Ticker"]].dropna(subset=["Ticker"])
+    except (OSError, KeyError, ValueError) as e:
+        if os.path.exists(path): print(f"Universe Error: {e}")
+        rows = [(c, n, t) for c, tokens in (default or {}).items() for n, t in tokens.items()]
+        universe = pd.DataFrame(rows, columns=["Category", "Name", "Ticker"])
+    universe["Ticker"] = universe["Ticker"].str.strip()
+    universe["Name"] = universe["Name"].fillna(universe["Ticker"])
+    universe["Category"] = universe["Category"].fillna("OTHER")
+    return universe.drop_duplicates("Ticker").reset_index(drop=True)
+
+# --- 💾 PRICE STORE ---
+# One CSV of daily bars per ticker. Updates only ask upstream for bars from the last stored
+# day onwards (that day is re-fetched too, since today's bar keeps moving until the close)
+# and append just the rows that are new or changed; the last row per date wins on load, and
+# a file is rewritten only once those superseded rows pile up.
+PRICE_STORE_DIR = os.environ.get("SMFC_PRICE_STORE", os.path.join(ROOT_DIR, "data", "prices"))
+STORE_FRESH_SECONDS = 600
+HISTORY_PERIOD = "5y"
+OHLC_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+STORE_COMPACT_AFTER = 50 # superseded rows a file may carry before it is rewritten
+# The page, PriceCache's refresher thread and the alert loop all update the same store:
+# every CSV read-compact, rewrite and append happens under this lock, as does the meta merge
+_store_lock = threading.RLock()
+
+def store_path(ticker):
+    return os.path.join(PRICE_STORE_DIR, re.sub(r'[^A-Za-z0-9._-]', '_', ticker) + ".csv")
+
+def normalize_bars(df):
+    df = df[[c for c in OHLC_COLUMNS if c in df.columns]].copy()
+    idx = pd.to_datetime(df.index)
+    if idx.tz is not None: idx = idx.tz_localize(None)
+    df.index = idx.normalize()
+    df.index.name = "Date"
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+def load_stored(ticker):
+    path = store_path(ticker)
+    if not os.path.exists(path): return None
+    with _store_lock:
+        try: df = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+        except Exception as e:
+            print(f"Price Store Error ({ticker}): {e}")
+            return None
+        superseded = df.index.duplicated(keep='last')
+        if superseded.any():
+            df = df[~superseded].sort_index()
+            if superseded.sum() > STORE_COMPACT_AFTER: save_stored(ticker, df)
+    return None if df.empty else df
+
+def save_stored(ticker, df):
+    os.makedirs(PRICE_STORE_DIR, exist_ok=True)
+    path = store_path(ticker)
+    with _store_lock:
+        df.to_csv(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+def append_stored(ticker, stored, bars):
+    # -> merged bars. Writes only rows that are new or differ from what is on disk.
+    if stored is None:
+        save_stored(ticker, bars)
+        return bars
+    bars = bars.reindex(columns=stored.columns)
+    overlap = bars.index.intersection(stored.index)
+    same = (bars.loc[overlap].fillna(0) == stored.loc[overlap].fillna(0)).all(axis=1)
+    changed = bars.drop(same[same].index)
+    if changed.empty: return stored
+    with _store_lock: changed.to_csv(store_path(ticker), mode="a", header=False)
+    merged = pd.concat([stored.drop(changed.index.intersection(stored.index)), changed])
+    return merged.sort_index()
+
+def load_store_meta():
+    # {"checked": {ticker: epoch}, "period": {ticker: history period the file was seeded with}}
+    try:
+        with open(os.path.join(PRICE_STORE_DIR, "_meta.json")) as f: meta = json.load(f)
+    except (OSError, ValueError): meta = {}
+    return {"checked": meta.get("checked", {}), "period": meta.get("period", {})}
+
+def save_store_meta(meta):
+    os.makedirs(PRICE_STORE_DIR, exist_ok=True)
+    path = os.path.join(PRICE_STORE_DIR, "_meta.json")
+    with open(path + ".tmp", "w") as f: json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+def merge_store_meta(checked, period):
+    # Re-read under the lock so concurrent updaters never drop each other's entries
+    with _store_lock:
+        meta = load_store_meta()
+        meta["checked"].update(checked)
+        meta["period"].update(period)
+        save_store_meta(meta)
+
+# Last computed window matrix, so a cold process can show the grid before the store is read
+def snapshot_path():
+    return os.path.join(PRICE_STORE_DIR, "_window_matrix.pkl")
+
+def save_snapshot(frame, path=None):
+    path = path or snapshot_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame.to_pickle(path + ".tmp")
+        os.replace(path + ".tmp", path)
+    except OSError as e: print(f"Snapshot Error: {e}")
+
+def load_snapshot(path=None):
+    try: return pd.read_pickle(path or snapshot_path())
+    except Exception: return None
+
+def update_store(tickers, max_age=STORE_FRESH_SECONDS):
+    # Returns ticker -> bars (or None). Tickers checked within max_age are served straight
+    # from disk, and anything upstream fails to deliver keeps its stored bars.
+    tickers = list(dict.fromkeys(tickers))
+    meta = load_store_meta()
+    now = time.time()
+    stored = {t: load_stored(t) for t in tickers}
+    # Files seeded with a shorter history than HISTORY_PERIOD get re-seeded once
+    seeded = {t: stored[t] if meta["period"].get(t) == HISTORY_PERIOD else None for t in tickers}
+
+    groups = {}
+    for t in tickers:
+        if now - meta["checked"].get(t, 0) < max_age and seeded[t] is not None: continue
+        start = None if seeded[t] is None else seeded[t].index[-1].strftime('%Y-%m-%d')
+        groups.setdefault(start, []).append(t)
+
+    checked = {}
+    for start, group in groups.items():
+        fetched = get_provider().fetch(group, period=HISTORY_PERIOD, start=start)
+        for t in group:
+            if fetched.get(t) is None: continue
+            bars = normalize_bars(fetched[t])
+            if seeded[t] is None:
+                # (Re-)seeding: the fetch covers the whole period, so the file is rewritten once
+                if stored[t] is not None: bars = pd.concat([stored[t], bars])
+                bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+                save_stored(t, bars)
+                stored[t] = bars
+            else:
+                stored[t] = append_stored(t, stored[t], bars)
+            checked[t] = now
+    if checked: merge_store_meta(checked, {t: HISTORY_PERIOD for t in checked})
+    return stored
+
+# --- ♻️ STALE-WHILE-REVALIDATE CACHE ---
+REFRESH_WAIT = 120 # longest a waiting caller blocks on another thread's load
+class PriceCache:
+    # Last good bars per ticker, in memory. Once a ticker has data, get() never waits on the
+    # network: expired entries are served as-is while a background refresh runs. A daemon
+    # thread re-warms watched tickers `margin` seconds before they expire, and invalidate()
+    # refreshes only the tickers it is given (e.g. one category) instead of everything.
+    def __init__(self, ttl=STORE_FRESH_SECONDS, margin=60, poll=15):
+        self.ttl = ttl
+        self.margin = margin
+        self.poll = poll
+        self.entries = {}
+        self.watched = set()
+        self.pending = set()
+        self.version = 0
+        self.lock = threading.Lock()
+        # Notified whenever a load finishes, so callers can wait on tickers another thread holds
+        self.loaded = threading.Condition(self.lock)
+        self.thread = None
+
+    def refresh(self, tickers, force=False, wait=True):
+        # Loads the tickers nobody else is loading. wait=True also waits for the ones already in
+        # flight on another thread; force=True waits those out and then reloads them itself.
+        tickers = list(dict.fromkeys(tickers))
+        with self.lock:
+            if force and wait: self.loaded.wait_for(lambda: self.pending.isdisjoint(tickers), REFRESH_WAIT)
+            mine = [t for t in tickers if t not in self.pending]
+            self.pending.update(mine)
+        if mine: self.load(mine, force)
+        if wait:
+            with self.lock: self.loaded.wait_for(lambda: self.pending.isdisjoint(tickers), REFRESH_WAIT)
+
+    def load(self, tickers, force=False):
+        try:
+            bars = update_store(tickers, max_age=0 if force else self.ttl - self.margin)
+            now = time.time()
+            with self.lock:
+                for t, df in bars.items():
+                    # Keep serving the previous bars if this round came back empty
+                    if df is not None or t not in self.entries: self.entries[t] = (df, now)
+                    else: self.entries[t] = (self.entries[t][0], now)
+                self.version += 1
+        except Exception as e:
+            print(f"Price Refresh Error: {e}")
+        finally:
+            with self.lock:
+                self.pending.difference_update(tickers)
+                self.loaded.notify_all()
+
+    def refresh_async(self, tickers, force=False):
+        threading.Thread(target=self.refresh, args=(tickers, force, False), daemon=True).start()
+
+    def due(self, tickers, age):
+        now = time.time()
+        with self.lock: return [t for t in tickers if t in self.entries and now - self.entries[t][1] >= age]
+
+    def run_refresher(self):
+        while True:
+            time.sleep(self.poll)
+            with self.lock: watched = list(self.watched)
+            due = self.due(watched, self.ttl - self.margin)
+            if due: self.refresh(due, wait=False)
+
+    def get(self, tickers, wait=True):
+        # Returns ({ticker: bars or None}, version); version bumps on every completed refresh.
+        # wait=True blocks until every ticker has loaded once, even if another session started
+        # the load; wait=False never blocks: tickers not loaded yet come back None.
+        tickers = list(dict.fromkeys(tickers))
+        with self.lock:
+            self.watched.update(tickers)
+            missing = [t for t in tickers if t not in self.entries]
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run_refresher, daemon=True)
+                self.thread.start()
+        if missing:
+            if wait: self.refresh(missing)
+            else: self.refresh_async(missing)
+        expired = self.due(tickers, self.ttl)
+        if expired: self.refresh_async(expired)
+        with self.lock:
+            return {t: self.entries.get(t, (None, 0))[0] for t in tickers}, self.version
+
+    def ready(self, tickers):
+        # True once every ticker has been through one refresh (with or without data)
+        with self.lock: return all(t in self.entries for t in tickers)
+
+    def invalidate(self, tickers, wait=True):
+        if wait: self.refresh(tickers, force=True)
+        else: self.refresh_async(tickers, force=True)
+
+# --- 📡 INTRADAY RING BUFFER ---
+INTRADAY_INTERVAL = "1m"
+INTRADAY_BARS = 400 # one NSE session is 375 one-minute bars
+INTRADAY_MIN_GAP = 30
+
+class IntradayBuffer:
+    # Per-ticker ring buffer of today's minute closes plus running session high/low/last,
+    # all taken from closes so live figures follow the daily (close-only) window matrix.
+    # Each poll appends only the bars after the last one held and folds them into the
+    # session extremes, so the update is O(new bars); a new trading day resets the ticker.
+    def __init__(self, maxlen=INTRADAY_BARS, interval=INTRADAY_INTERVAL, min_gap=INTRADAY_MIN_GAP):
+        self.maxlen = maxlen
+        self.interval = interval
+        self.min_gap = min_gap
+        self.bars = {}
+        self.session = {}
+        self.polled = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def append(self, ticker, df):
+        idx = pd.to_datetime(df.index)
+        if idx.tz is not None: idx = idx.tz_convert(MARKET_TZ).tz_localize(None)
+        df = df.set_axis(idx)
+        last = self.session.get(ticker)
+        if last is not None and df.index[-1].normalize() != last["time"].normalize(): last = None
+        if last is None:
+            self.bars[ticker] = deque(maxlen=self.maxlen)
+        else:
+            df = df[df.index > last["time"]]
+            if df.empty: return False
+        self.bars[ticker].extend(zip(df.index, df["Close"]))
+        high, low = df["Close"].max(), df["Close"].min()
+        self.session[ticker] = {
+            "last": df["Close"].iloc[-1], "time": df.index[-1],
+            "high": high if last is None else max(last["high"], high),
+            "low": low if last is None else min(last["low"], low),
+        }
+        return True
+
+    def poll(self, tickers, force=False):
+        # Returns the tickers that got new bars. Outside market hours only empty buffers are
+        # filled (with the last session), and polls closer than min_gap apart are skipped.
+        tickers = list(dict.fromkeys(tickers))
+        with self.lock:
+            if not force and time.time() - self.polled < self.min_gap: return set()
+            if not force and not market_open(): tickers = [t for t in tickers if t not in self.session]
+            if not tickers: return set()
+            self.polled = time.time()
+        # Upstream minute bars can't be requested from a time of day, so each poll pulls the
+        # (small) current session and append() keeps only the bars newer than what is held
+        try: fetched = get_provider().fetch(tickers, period="1d", interval=self.interval)
+        except Exception as e:
+            print(f"Intraday Poll Error: {e}")
+            return set()
+        changed = set()
+        with self.lock:
+            for t in tickers:
+                df = fetched.get(t)
+                if df is not None and not df.empty and self.append(t, df): changed.add(t)
+        if changed:
+            with self.lock: self.version += 1
+        return changed
+
+    def snapshot(self, tickers):
+        # ticker x (last, high, low, time) for tickers with a live session
+        with self.lock: rows = {t: self.session[t] for t in tickers if t in self.session}
+        return pd.DataFrame.from_dict(rows, orient="index", columns=["last", "high", "low", "time"])
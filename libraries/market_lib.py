@@ -1,10 +1,18 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime
 
+try:
+    from libraries.styles import apply_stylesheet
+    from libraries.market_data import PriceCache, IntradayBuffer, load_universe, market_open, save_snapshot, load_snapshot
+    from libraries.market_analytics import WINDOW_MAP, compute_window_matrix, rank_dips, apply_intraday
+except ImportError:
+    from styles import apply_stylesheet
+    from market_data import PriceCache, IntradayBuffer, load_universe, market_open, save_snapshot, load_snapshot
+    from market_analytics import WINDOW_MAP, compute_window_matrix, rank_dips, apply_intraday
+
 # --- 📋 ASSETS CONFIGURATION ---
+# The live universe comes from config/dip_universe.csv (or SMFC_DIP_UNIVERSE); this is the fallback
 ASSETS = {
     # 1. RENAMED CATEGORY
     "🟡 COMMODITIES ETF": { "Gold Bees": "GOLDBEES.NS", "Silver Bees": "SILVERBEES.NS" },
@@ -13,205 +21,160 @@ ASSETS = {
     "🇮🇳 INDIAN ETFs": { "CPSE ETF": "CPSEETF.NS", "Groww Power": "GROWWPOWER.NS", "Groww Rail": "GROWWRAIL.NS", "Alpha Low Vol 30": "ALPL30IETF.NS", "Smallcap 250": "HDFCSML250.NS", "Momentum 30": "MOMOMENTUM.NS", "Defense ETF": "MODEFENCE.NS", "Realty ETF": "MOREALTY.NS", "Auto Bees": "AUTOBEES.NS", "Pharma Bees": "PHARMABEES.NS", "Bank Bees": "BANKBEES.NS", "Junior Bees": "JUNIORBEES.NS", "IT Bees": "ITBEES.NS", "PSU Bank Bees": "PSUBNKBEES.NS" },
 }
 
-WINDOW_MAP = {'1D': 2, '2D': 3, '3D': 4, '4D': 5, '1W': 6, '2W': 11, '3W': 16, '4W': 23}
+METRIC_COLS = ["curr", "high", "low", "return", "drawdown", "max_drawdown"]
+RANK_BY = {"Drawdown": "drawdown", "Z-score": "zscore"}
+DIP_PAGE_SIZE = 24
+LARGE_UNIVERSE = 60 # above this, the category view is opt-in
+LIVE_REFRESH_SECONDS = 60
+COLD_POLL_SECONDS = 2 # how often a page showing the snapshot checks for fresh prices
 
 # --- 🛡️ DATA ENGINE (Helper Functions) ---
 
-@st.cache_data(ttl=600)
-def get_history(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="3mo", interval="1d", timeout=3)
-        return None if df.empty else df
-    except:
-        return None
-
-def create_drop_chart(curr, high, low, drawdown):
-    fig = go.Figure()
-    
+@st.cache_data(ttl=600, show_spinner=False)
+def get_universe():
+    return load_universe(default=ASSETS)
+
+@st.cache_resource
+def get_price_cache():
+    # One per process: serves last good bars while a background thread re-warms them
+    return PriceCache()
+
+@st.cache_resource
+def get_intraday_buffer():
+    # Shared by every session, so N open tabs still mean one minute-bar poll per interval
+    return IntradayBuffer()
+
+def get_universe_history(tickers):
+    return get_price_cache().get(tickers)[0]
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_window_matrix(tickers, version):
+    # Keyed on the cache version, so it is rebuilt once per data refresh rather than per click
+    matrix = compute_window_matrix(get_universe_history(tickers), WINDOW_MAP)
+    # An empty matrix (nothing loaded / every fetch failed) must never replace a good snapshot
+    if not matrix.empty: save_snapshot(matrix)
+    return matrix
+
+def get_window_matrix(tickers):
+    # -> (matrix, stale). While a cold process is still loading prices (in the background),
+    # the last saved matrix is served at once; with no snapshot yet, the page waits for that
+    # same load (PriceCache.get blocks on tickers already in flight).
+    cache = get_price_cache()
+    _, version = cache.get(tickers, wait=False)
+    if not cache.ready(tickers):
+        snapshot = load_snapshot()
+        if snapshot is not None and not snapshot.empty: return snapshot[snapshot.index.isin(tickers)], True
+        with st.spinner("Fetching prices..."): _, version = cache.get(tickers)
+    return build_window_matrix(tickers, version), False
+
+@st.fragment(run_every=COLD_POLL_SECONDS)
+def await_prices(tickers):
+    # Swaps the snapshot for live data as soon as the background load finishes
+    if get_price_cache().ready(tickers): st.rerun(scope="app")
+
+def drop_colors(drawdown):
     drop_magnitude = abs(drawdown)
-    
-    if drop_magnitude < 3:
-        bar_color = "#cbd5e1" # Light Grey
-        text_color = "#94a3b8"
-    elif drop_magnitude < 10:
-        bar_color = "#f59e0b" # Amber/Orange
-        text_color = "#d97706"
-    else:
-        bar_color = "#ef4444" # Red
-        text_color = "#dc2626"
-
-    # 1. Full Range Backbone
-    fig.add_trace(go.Scatter(
-        x=[0, 0], y=[low, high],
-        mode='lines',
-        line=dict(color='#e2e8f0', width=6),
-        hoverinfo='skip'
-    ))
-
-    # 2. THE DROP BAR (High DOWN to Current)
-    fig.add_trace(go.Scatter(
-        x=[0, 0], y=[high, curr],
-        mode='lines',
-        line=dict(color=bar_color, width=12),
-        hoverinfo='skip'
-    ))
+    if drop_magnitude < 3: return "#cbd5e1", "#94a3b8" # Light Grey
+    if drop_magnitude < 10: return "#f59e0b", "#d97706" # Amber/Orange
+    return "#ef4444", "#dc2626" # Red
+
+def create_drop_svg(curr, high, low, drawdown, width=160, height=140):
+    # Same drop bar the old Plotly chart drew, as a few hundred bytes of static SVG
+    bar_color, text_color = drop_colors(drawdown)
+    pad = (high - low) * 0.1 or max(abs(high) * 0.01, 1)
+    y_top, y_bot = high + pad, low - pad
+    def y(v): return round((y_top - v) / (y_top - y_bot) * height, 1)
+    x = width * 0.45
+    label = f"<text x='{x + 14}' y='{y((high + curr) / 2) + 5}' fill='{text_color}' font-size='15' font-weight='700' font-family='Inter'>{drawdown:.1f}%</text>" if abs(drawdown) > 0.1 else ""
+    return (
+        f"<svg viewBox='0 0 {width} {height}' width='100%' height='{height}' xmlns='http://www.w3.org/2000/svg'>"
+        f"<line x1='{x}' y1='{y(low)}' x2='{x}' y2='{y(high)}' stroke='#e2e8f0' stroke-width='6' stroke-linecap='round'/>"
+        f"<line x1='{x}' y1='{y(high)}' x2='{x}' y2='{y(curr)}' stroke='{bar_color}' stroke-width='12'/>"
+        f"<circle cx='{x}' cy='{y(curr)}' r='6' fill='white' stroke='{bar_color}' stroke-width='3'/>"
+        f"<circle cx='{x}' cy='{y(high)}' r='3' fill='{bar_color}'/>"
+        f"<text x='{x - 14}' y='{y(high) + 4}' fill='#64748b' font-size='11' font-weight='700' text-anchor='end'>H {high:,.0f}</text>"
+        f"<text x='{x - 14}' y='{y(low) + 4}' fill='#64748b' font-size='11' font-weight='700' text-anchor='end'>L {low:,.0f}</text>"
+        f"{label}</svg>"
+    )
 
-    # 3. Current Price Marker
-    fig.add_trace(go.Scatter(
-        x=[0], y=[curr],
-        mode='markers',
-        marker=dict(color='white', size=14, line=dict(color=bar_color, width=3)),
-        hoverinfo='skip'
-    ))
-    
-    # 4. Top Anchor
-    fig.add_trace(go.Scatter(
-        x=[0], y=[high],
-        mode='markers',
-        marker=dict(color=bar_color, size=6),
-        hoverinfo='skip'
-    ))
+def currency_for(category):
+    return "$" if "USD" in category else "₹"
+
+def render_asset_card(name, metrics, currency, window):
+    if metrics is None:
+        return f"<div class='dip-card'><div class='dip-info'><div class='asset-title'>{name}</div><div class='trend-text'>Loading...</div></div></div>"
+    curr, high, low, pct_return, drawdown, max_dd = metrics
+    trend_color = "#10b981" if pct_return >= 0 else "#ef4444"
+    arrow = "▲" if pct_return >= 0 else "▼"
+    return (
+        f"<div class='dip-card'><div class='dip-info'>"
+        f"<div class='asset-title'>{name}</div>"
+        f"<div class='hero-price'>{currency}{curr:,.0f}</div>"
+        f"<div class='trend-text' style='color:{trend_color}'>{arrow} {pct_return:+.2f}% <span style='color:#94a3b8; font-weight:400'>since {window} · worst {max_dd:.1f}%</span></div>"
+        f"</div><div class='dip-vis'>{create_drop_svg(curr, high, low, drawdown)}</div></div>"
+    )
 
-    # 5. LABELS
-    fig.add_annotation(x=-0.2, y=high, text=f"H {high:,.0f}", showarrow=False, xanchor="right", font=dict(color="#64748b", size=11, weight="bold"))
-    fig.add_annotation(x=-0.2, y=low, text=f"L {low:,.0f}", showarrow=False, xanchor="right", font=dict(color="#64748b", size=11, weight="bold"))
-    
-    # 6. THE PERCENTAGE
-    mid_point = (high + curr) / 2
-    
-    if drop_magnitude > 0.1:
-        fig.add_annotation(
-            x=0.2, y=mid_point, 
-            text=f"<b>{drawdown:.1f}%</b>", 
-            showarrow=False, xanchor="left",
-            font=dict(color=text_color, size=15, family="Inter")
-        )
+def render_dip_grid(universe, current_window, live=False):
+    all_tickers = tuple(universe['Ticker'])
+    matrix, stale = get_window_matrix(all_tickers)
+    if stale:
+        st.caption("Showing the last saved snapshot · loading fresh prices...")
+        await_prices(all_tickers)
+    window_view = matrix[current_window] if current_window in matrix.columns.get_level_values(0) else pd.DataFrame(columns=METRIC_COLS + ["zscore"])
+    if live:
+        # New minute bars are folded into the daily view incrementally (no history recompute)
+        buffer = get_intraday_buffer()
+        buffer.poll(all_tickers)
+        session = buffer.snapshot(all_tickers)
+        window_view = apply_intraday(window_view, session)
+        status = f"Live · last bar {session['time'].max():%H:%M}" if not session.empty else "Live · waiting for first bars"
+        if not market_open(): status += " · market closed"
+        st.caption(status)
+
+    def card(row):
+        metrics = window_view.loc[row.Ticker, METRIC_COLS] if row.Ticker in window_view.index else None
+        return render_asset_card(row.Name, metrics, currency_for(row.Category), current_window)
+
+    c_mode, c_rank = st.columns([1, 1])
+    modes = ["Top dips", "By category"]
+    view_mode = c_mode.radio("View", modes, index=0 if len(universe) > LARGE_UNIVERSE else 1, horizontal=True, key="dip_view")
+    rank_label = c_rank.radio("Rank by", list(RANK_BY), horizontal=True, key="dip_rank", disabled=view_mode != "Top dips")
+
+    # Whole grid as one HTML payload: static SVG drop bars instead of one Plotly chart per asset
+    if view_mode == "Top dips":
+        # Rank once over the full window matrix, then only the visible page is turned into HTML
+        ranked = rank_dips(window_view, RANK_BY[rank_label])
+        pages = max(1, -(-len(ranked) // DIP_PAGE_SIZE))
+        if st.session_state.dip_page > pages: st.session_state.dip_page = pages
+        page = st.session_state.dip_page
+        rows = universe.set_index('Ticker').loc[ranked[(page - 1) * DIP_PAGE_SIZE:page * DIP_PAGE_SIZE]].reset_index()
+        cards = "".join(card(row) for row in rows.itertuples())
+        grid_html = f"<div class='section-title'>🎯 TOP DIPS · {current_window}</div><div class='section-line'></div><div class='dip-grid'>{cards}</div>"
+        st.markdown(grid_html, unsafe_allow_html=True)
+        if pages > 1:
+            st.number_input(f"Page (of {pages}, {len(ranked)} assets)", min_value=1, max_value=pages, step=1, key="dip_page")
+    else:
+        grid_html = ""
+        for category, group in universe.groupby('Category', sort=False):
+            cards = "".join(card(row) for row in group.itertuples())
+            grid_html += f"<div class='section-title'>{category}</div><div class='section-line'></div><div class='dip-grid'>{cards}</div>"
+        st.markdown(grid_html, unsafe_allow_html=True)
 
-    fig.update_layout(
-        xaxis=dict(visible=False, range=[-0.8, 1.0]),
-        yaxis=dict(visible=False, range=[low - (high-low)*0.1, high + (high-low)*0.1]),
-        margin=dict(l=0, r=0, t=0, b=0),
-        height=140,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        showlegend=False
-    )
-    return fig
+render_live_grid = st.fragment(run_every=LIVE_REFRESH_SECONDS)(render_dip_grid)
 
 # --- 🚀 MAIN APPLICATION LOGIC ---
 
 def run_dip_hunter():
-    # --- 🎨 FINAL CSS POLISH ---
-    st.markdown("""
-    <style>
-        /* 1. BACKGROUND */
-        .stApp {
-            background: linear-gradient(135deg, #f0f4f8 0%, #d9e2ec 100%);
-            color: #102a43;
-        }
-        
-        /* 2. REMOVE DEFAULT PADDING */
-        div[data-testid="stVerticalBlock"] > div > div {
-            background: transparent !important;
-            border: none !important;
-            box-shadow: none !important;
-            padding: 0 !important;
-        }
-        
-        /* 3. TYPOGRAPHY & HEADERS */
-        div.section-title {
-            color: #102a43;
-            font-family: 'Helvetica Neue', sans-serif;
-            font-weight: 800;
-            font-size: 26px; /* BIGGER */
-            letter-spacing: 0.5px;
-            margin-top: 50px; /* More space above */
-            margin-bottom: 10px;
-            text-transform: uppercase;
-            display: flex;
-            align-items: center;
-        }
-        
-        /* subtle separator line */
-        div.section-line {
-            height: 2px;
-            background: linear-gradient(to right, #102a43, transparent);
-            margin-bottom: 25px;
-            opacity: 0.2;
-        }
-
-        div.asset-title {
-            font-family: 'Helvetica Neue', sans-serif;
-            color: #486581;
-            font-size: 14px;
-            font-weight: 700;
-            letter-spacing: 0.8px;
-            text-transform: uppercase;
-            margin-bottom: 2px;
-        }
-        
-        div.hero-price {
-            font-family: 'Inter', sans-serif;
-            color: #102a43;
-            font-size: 46px; 
-            font-weight: 800;
-            line-height: 1;
-            letter-spacing: -1.5px;
-            /* Force text to stay on one line */
-            white-space: nowrap; 
-        }
-
-        div.trend-text {
-            font-size: 14px;
-            color: #627d98;
-            margin-top: 6px;
-            font-weight: 600;
-            font-family: 'Inter', sans-serif;
-        }
-
-        /* 4. INFO CARD (LEGEND) */
-        div.legend-card {
-            background: rgba(255, 255, 255, 0.75);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.9);
-            border-radius: 16px;
-            padding: 20px 30px;
-            margin: 20px 0 40px 0;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.05);
-            font-family: 'Inter', sans-serif;
-        }
-
-        /* 5. TIMEFRAME LABEL */
-        div.timeframe-label {
-            font-size: 14px; /* INCREASED */
-            font-weight: 800;
-            color: #334e68;
-            letter-spacing: 1px;
-            text-transform: uppercase;
-            margin-bottom: 8px;
-        }
-
-        /* 6. BUTTONS */
-        div.stButton > button {
-            border-radius: 50px;
-            font-size: 13px; /* Slightly bigger */
-            font-weight: 600;
-            height: 2.5rem;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-            border: 1px solid rgba(255,255,255,0.5);
-        }
-        
-        .js-plotly-plot .plotly .main-svg { background: transparent !important; }
-        div.block-container { padding-top: 2rem; }
-    </style>
-    """, unsafe_allow_html=True)
+    # --- 🎨 FINAL CSS POLISH (bundled in styles.py) ---
+    apply_stylesheet("dip_hunter")
 
     # --- 🔄 STATE ---
     if 'selected_window' not in st.session_state: st.session_state.selected_window = '1W'
+    if 'dip_page' not in st.session_state: st.session_state.dip_page = 1
     
     def set_window(val): 
         st.session_state.selected_window = val
+        st.session_state.dip_page = 1
 
     # --- 🖥️ HEADER ---
     c_title, c_time = st.columns([2, 1])
@@ -225,17 +188,13 @@ def run_dip_hunter():
     st.write("")
     st.markdown("<div class='timeframe-label'>TIMEFRAME (Lookback Period)</div>", unsafe_allow_html=True)
 
-    cols = st.columns(8)
-    options = ['1D', '2D', '3D', '4D', '1W', '2W', '3W', '4W']
+    options = list(WINDOW_MAP)
+    cols = st.columns(len(options))
     current_window = st.session_state.selected_window
 
     for i, opt in enumerate(options):
         btn_type = "primary" if current_window == opt else "secondary"
-        if cols[i].button(opt, key=f"btn_{opt}", type=btn_type, use_container_width=True):
-            set_window(opt)
-            st.rerun()
-
-    days_back = WINDOW_MAP.get(current_window, 6)
+        cols[i].button(opt, key=f"btn_{opt}", type=btn_type, use_container_width=True, on_click=set_window, args=(opt,))
 
     # --- 📘 IMPROVED LEGEND CARD ---
     st.markdown("""
@@ -275,71 +234,16 @@ def run_dip_hunter():
     """, unsafe_allow_html=True)
 
     # --- 🔄 MAIN GRID ---
-    outer_cols = st.columns(3)
-    col_counter = 0
-
-    for category, tokens in ASSETS.items():
-        # MODERN SECTION HEADER
-        st.markdown(f"""
-            <div class='section-title'>
-                {category}
-            </div>
-            <div class='section-line'></div>
-        """, unsafe_allow_html=True)
-        
-        outer_cols = st.columns(3)
-        col_counter = 0
-
-        for name, ticker in tokens.items():
-            curr_col = outer_cols[col_counter % 3]
-            
-            with curr_col:
-                df = get_history(ticker)
-                
-                if df is not None and len(df) >= 2:
-                    df_slice = df.tail(days_back)
-                    curr = df_slice['Close'].iloc[-1]
-                    high = df_slice['Close'].max()
-                    low = df_slice['Close'].min()
-                    
-                    # METRIC 1: Time Return
-                    start_price = df_slice['Close'].iloc[0]
-                    pct_return = ((curr - start_price) / start_price) * 100
-                    
-                    # METRIC 2: Drawdown
-                    drawdown = ((curr - high) / high) * 100
-                    
-                    currency = "$" if "USD" in category else "₹"
-                    
-                    # 3. FIX: GIVE TEXT COLUMN MORE SPACE [1, 1] instead of [0.8, 1]
-                    c_info, c_vis = st.columns([1, 1])
-                    
-                    with c_info:
-                        st.markdown(f"<div class='asset-title'>{name}</div>", unsafe_allow_html=True)
-                        st.markdown(f"<div class='hero-price'>{currency}{curr:,.0f}</div>", unsafe_allow_html=True)
-                        
-                        # Trend Text
-                        trend_color = "#10b981" if pct_return >= 0 else "#ef4444"
-                        arrow = "▲" if pct_return >= 0 else "▼"
-                        st.markdown(f"""
-                            <div class='trend-text' style='color:{trend_color}'>
-                                {arrow} {pct_return:+.2f}% <span style='color:#94a3b8; font-weight:400'>since {current_window}</span>
-                            </div>
-                        """, unsafe_allow_html=True)
-
-                    with c_vis:
-                        st.plotly_chart(
-                            create_drop_chart(curr, high, low, drawdown),
-                            use_container_width=True,
-                            config={'staticPlot': True}
-                        )
-                else:
-                    st.markdown(f"**{name}**")
-                    st.warning("Loading...")
-                    
-            col_counter += 1
-            if col_counter % 3 == 0: st.write("")
-
-    if st.button("Refresh Prices"):
-        st.cache_data.clear()
-        st.rerun()
\ No newline at end of file
+    universe = get_universe()
+    all_tickers = tuple(universe['Ticker'])
+    live = st.toggle("⚡ Live intraday (1m bars)", key="dip_live", help=f"Polls minute bars during market hours and updates the cards every {LIVE_REFRESH_SECONDS}s")
+    # Only the grid fragment re-runs on the live timer; header, buttons and legend stay put
+    (render_live_grid if live else render_dip_grid)(universe, current_window, live)
+
+    # Scoped refresh: only the chosen category's tickers are re-fetched, other caches stay put
+    c_scope, c_refresh = st.columns([3, 1])
+    scope = c_scope.selectbox("Refresh scope", ["All assets"] + list(universe['Category'].unique()), label_visibility="collapsed")
+    if c_refresh.button("Refresh Prices", use_container_width=True):
+        scope_tickers = all_tickers if scope == "All assets" else tuple(universe.loc[universe['Category'] == scope, 'Ticker'])
+        with st.spinner("Refreshing..."): get_price_cache().invalidate(scope_tickers)
+        st.rerun()
@@ -0,0 +1,45 @@
+# libraries/share.py
+import streamlit as st
+import streamlit.components.v1 as components
+import hashlib
+import os
+
+try:
+    from libraries.styles import STATIC_DIR
+except ImportError:
+    from styles import STATIC_DIR
+
+# --- 📤 SHARE COMPONENT ---
+# Static frontend in share_component/. With a stable key the iframe is created once and
+# later reruns only post new args to it, instead of rebuilding an inline components.html iframe.
+SHARE_COMPONENT_VERSION = 2
+SHARE_IMAGES_KEPT = 20
+_share_component = components.declare_component(
+    f"smfc_share_v{SHARE_COMPONENT_VERSION}",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "share_component")
+)
+
+@st.cache_data(show_spinner=False, max_entries=10)
+def publish_png(image_png):
+    # Writes the PNG next to the stylesheets (static serving) under a content-hashed name and
+    # returns its path relative to the app root; None when static serving is off. The component
+    # only gets this short path and fetches the bytes when Share / Copy image is clicked.
+    if not st.get_option("server.enableStaticServing"): return None
+    file_name = f"share_{hashlib.sha256(image_png).hexdigest()[:16]}.png"
+    try:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        path = os.path.join(STATIC_DIR, file_name)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as f: f.write(image_png)
+            os.replace(path + ".tmp", path)
+            old = sorted((f for f in os.listdir(STATIC_DIR) if f.startswith("share_") and f.endswith(".png")), key=lambda f: os.path.getmtime(os.path.join(STATIC_DIR, f)))
+            for f in old[:-SHARE_IMAGES_KEPT]: os.remove(os.path.join(STATIC_DIR, f))
+    except OSError as e:
+        print(f"Share Image Error: {e}")
+        return None
+    return f"app/static/{file_name}"
+
+def share_buttons(text, image_png=None, file_name="SMFC_Lineup.png", key="share"):
+    # Copy text everywhere; native share (text + PNG) where the browser supports it
+    image_url = publish_png(image_png) if image_png else None
+    return _share_component(text=text, image_url=image_url, file_name=file_name, key=key, default=None)
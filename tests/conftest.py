@@ -0,0 +1,32 @@
+# Shared helpers for the AI tests: a call-counting provider and per-test AI state.
+import pytest
+
+from libraries import ai_metrics, ai_providers, ai_scout
+from libraries.ai_cache import ResponseCache
+from libraries.ai_providers import LocalLLM
+
+class CountingLLM:
+    # Wraps a provider (or raises `error` before the first chunk) and counts calls
+    name = "counting"
+
+    def __init__(self, inner=None, error=None):
+        self.inner = inner or LocalLLM()
+        self.error = error
+        self.calls = 0
+
+    def stream(self, prompt, feature=None):
+        self.calls += 1
+        if self.error: raise self.error
+        yield from self.inner.stream(prompt, feature)
+
+@pytest.fixture
+def counting_llm():
+    return CountingLLM
+
+@pytest.fixture
+def ai_state(tmp_path, monkeypatch):
+    # Metrics, the scout cache and the shared client all point at per-test state
+    monkeypatch.setattr(ai_metrics, "METRICS", ai_metrics.MetricsLog(str(tmp_path / "metrics.jsonl")))
+    monkeypatch.setattr(ai_scout, "SCOUT_CACHE", ResponseCache("scout", folder=str(tmp_path)))
+    monkeypatch.setattr(ai_providers, "_llm", None)
+    monkeypatch.setattr(ai_providers, "_batch_llm", None)
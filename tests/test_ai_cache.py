@@ -0,0 +1,60 @@
+# Response cache and the scout's caching rules, on the deterministic LocalLLM (no network).
+import time
+
+import pandas as pd
+import pytest
+
+from libraries import ai_providers, ai_scout
+from libraries.ai_cache import ResponseCache
+
+pytestmark = pytest.mark.usefixtures("ai_state")
+
+def ask(question="Who is in form?"):
+    return ai_scout.ask_ai_scout(question, pd.DataFrame(), pd.DataFrame())
+
+def test_response_cache_hit_miss_and_lru(tmp_path):
+    cache = ResponseCache("t", max_entries=2, folder=str(tmp_path))
+    assert cache.get("a") is None
+    cache.set("a", "A")
+    assert cache.get("a") == "A"
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Persisted: a fresh instance (new process) sees it
+    assert ResponseCache("t", folder=str(tmp_path)).get("a") == "A"
+    time.sleep(0.01)
+    cache.set("b", "B")
+    time.sleep(0.01)
+    cache.get("a") # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.set("c", "C")
+    assert cache.get("b") is None and cache.get("a") == "A" and cache.get("c") == "C"
+
+def test_response_cache_expires(tmp_path):
+    cache = ResponseCache("t", ttl=60, folder=str(tmp_path))
+    cache.set("a", "A")
+    cache.entries["a"]["created"] -= 61
+    assert cache.get("a") is None
+
+def test_scout_answer_is_cached(counting_llm):
+    llm = counting_llm()
+    ai_providers.set_llm(llm, managed=False)
+    first = ask("Who is in form?")
+    second = ask("  who is in FORM ")
+    assert first and first == second
+    assert llm.calls == 1
+    assert ai_scout.SCOUT_CACHE.hits == 1
+
+def test_scout_errors_are_never_cached(counting_llm):
+    llm = counting_llm(error=RuntimeError("quota"))
+    ai_providers.set_llm(llm, managed=False)
+    assert "spirits are silent" in ask()
+    assert "spirits are silent" in ask()
+    assert llm.calls == 2
+    assert ai_scout.SCOUT_CACHE.load() == {}
+
+def test_scout_cache_key_includes_prompt_version(monkeypatch, counting_llm):
+    llm = counting_llm()
+    ai_providers.set_llm(llm, managed=False)
+    ask()
+    monkeypatch.setattr(ai_scout, "SCOUT_PROMPT_VERSION", ai_scout.SCOUT_PROMPT_VERSION + 1)
+    ask()
+    assert llm.calls == 2
@@ -0,0 +1,14 @@
+# Who the scout thinks a question is about.
+from libraries.ai_context import mentioned_players
+
+ROSTER = ["Alan Joseph", "Binu Joseph", "Tom Joseph", "Gilson Varghese", "Tom Mathew"]
+
+def test_full_name_beats_shared_surname():
+    assert mentioned_players("How is Alan Joseph doing", ROSTER) == ["Alan Joseph"]
+
+def test_unique_name_part_still_matches():
+    assert mentioned_players("what about gilson?", ROSTER) == ["Gilson Varghese"]
+    assert mentioned_players("Alan Joseph vs binu", ROSTER) == ["Alan Joseph", "Binu Joseph"]
+
+def test_shared_name_part_names_nobody():
+    assert mentioned_players("joseph or tom?", ROSTER) == []
@@ -0,0 +1,51 @@
+# AIRunner admission, cancellation, abandonment and start-up errors (no network).
+import threading
+import time
+
+from libraries.ai_jobs import AIRunner
+
+def wait_done(job, timeout=2):
+    give_up = time.time() + timeout
+    while not job.done() and time.time() < give_up: time.sleep(0.01)
+    return job.status
+
+def test_runner_turns_work_away_when_full():
+    gate = threading.Event()
+    def blocked():
+        gate.wait(2)
+        yield "x"
+    runner = AIRunner(max_in_flight=1, max_queued=1)
+    running, queued, extra = runner.submit(blocked), runner.submit(blocked), runner.submit(blocked)
+    assert extra.status == "busy"
+    assert runner.stats() == {"in_flight": 1, "queued": 1}
+    gate.set()
+    assert wait_done(running) == "done" and wait_done(queued) == "done"
+
+def test_cancelled_queued_job_never_runs():
+    gate = threading.Event()
+    started = []
+    def blocked():
+        started.append(1)
+        gate.wait(2)
+        yield "x"
+    runner = AIRunner(max_in_flight=1, max_queued=2)
+    first, second = runner.submit(blocked), runner.submit(blocked)
+    second.cancel()
+    gate.set()
+    assert wait_done(first) == "done"
+    assert second.status == "cancelled" and len(started) == 1
+    runner.pool.shutdown(wait=True)
+    assert runner.stats() == {"in_flight": 0, "queued": 0}
+
+def test_unpolled_job_is_abandoned():
+    def slow():
+        for i in range(50):
+            time.sleep(0.02)
+            yield str(i)
+    job = AIRunner().submit(slow, abandon_after=0.05)
+    assert wait_done(job) == "cancelled" and job.error == "abandoned"
+
+def test_stream_that_fails_on_call_ends_the_job():
+    def not_a_generator(): raise RuntimeError("boom")
+    job = AIRunner().submit(not_a_generator)
+    assert wait_done(job) == "error" and job.error == "boom"
@@ -0,0 +1,44 @@
+# LLM providers: the offline stand-ins and ManagedLLM's retry budget
+# (no network, no API key).
+import pytest
+
+from libraries.ai_providers import LocalLLM, ManagedLLM, ReplayLLM, RetryBudget, TokenBucket
+
+pytestmark = pytest.mark.usefixtures("ai_state")
+
+def test_local_llm_is_deterministic():
+    prompt = "Gilson: #1 M3 W2 L1 D0 66% form WWL\n"
+    assert "".join(LocalLLM().stream(prompt, "scout")) == "".join(LocalLLM().stream(prompt, "scout"))
+
+def test_replay_serves_recorded_answers(tmp_path, counting_llm):
+    path = str(tmp_path / "replay.jsonl")
+    recorded = "".join(ReplayLLM(path, record=LocalLLM()).stream("p", "scout"))
+    offline = counting_llm(error=RuntimeError("should not be called"))
+    assert "".join(ReplayLLM(path, fallback=offline).stream("p", "scout")) == recorded
+    assert offline.calls == 0
+
+def managed(llm, reserve=1):
+    return ManagedLLM(llm, bucket=TokenBucket(rate_per_min=6000, burst=100), budget=RetryBudget(ratio=0.2, reserve=reserve), backoff=0)
+
+def test_transient_errors_retry_until_the_budget_runs_out(counting_llm):
+    flaky = counting_llm(error=TimeoutError("slow"))
+    client = managed(flaky, reserve=1)
+    with pytest.raises(TimeoutError): list(client.stream("p", "scout"))
+    # One retry from the reserve, then the budget is exhausted
+    assert flaky.calls == 2
+    assert client.counters["retries"] == 1 and client.counters["budget_exhausted"] == 1
+    with pytest.raises(TimeoutError): list(client.stream("p", "scout"))
+    assert flaky.calls == 3
+
+def test_permanent_errors_are_not_retried(counting_llm):
+    broken = counting_llm(error=ValueError("bad request"))
+    client = managed(broken, reserve=5)
+    with pytest.raises(ValueError): list(client.stream("p", "scout"))
+    assert broken.calls == 1 and client.counters["retries"] == 0
+
+def test_successes_refill_the_retry_budget(counting_llm):
+    client = managed(counting_llm(), reserve=1)
+    client.budget.tokens = 0
+    for _ in range(5): list(client.stream("p", "scout"))
+    assert client.budget.tokens == pytest.approx(1.0)
+    assert client.stats()["ok"] == 5
@@ -0,0 +1,30 @@
+# Season recaps: background batches on their own rate budget, on the deterministic LocalLLM.
+import pandas as pd
+import pytest
+
+from libraries import ai_providers
+from libraries.ai_providers import LocalLLM
+from libraries.ai_recaps import RecapBatch, RecapStore
+
+pytestmark = pytest.mark.usefixtures("ai_state")
+
+HISTORY = pd.DataFrame([
+    {"Date": f"2025-01-0{i}", "Team_Blue": "Alan, Binu", "Team_Red": "Tom, Gilson", "Score_Blue": i, "Score_Red": 1, "Winner": "Blue"}
+    for i in range(2, 5)
+])
+
+def test_batch_client_has_its_own_budget(monkeypatch):
+    monkeypatch.setenv("SMFC_LLM_PROVIDER", "local")
+    shared, batch = ai_providers.get_llm(), ai_providers.get_batch_llm()
+    assert batch.llm is shared.llm
+    assert batch.bucket is not shared.bucket and batch.budget is not shared.budget
+    assert ai_providers.get_batch_llm() is batch
+
+def test_recap_batch_runs_in_the_background_and_resumes(tmp_path):
+    store = RecapStore(str(tmp_path / "recaps.jsonl"))
+    batch = RecapBatch(HISTORY, store=store, llm=LocalLLM())
+    batch.thread.join(5)
+    assert batch.status == "done" and batch.counts == {"done": 3, "failed": 0, "skipped": 0}
+    again = RecapBatch(HISTORY, store=RecapStore(store.path), llm=LocalLLM())
+    again.thread.join(5)
+    assert again.counts == {"done": 0, "failed": 0, "skipped": 3} and again.total == 0
@@ -0,0 +1,20 @@
+# Alert de-duplication: fire once per rule and ticker, re-arm on clear or after the cooldown.
+import pandas as pd
+
+from libraries.market_alerts import dedupe
+
+def hits(*pairs):
+    return pd.DataFrame([{"rule": r, "expr": "x", "ticker": t} for r, t in pairs], columns=["rule", "expr", "ticker"])
+
+def test_dedupe_fires_once_then_rearms():
+    state = {}
+    sent, state = dedupe(hits(("deep", "AAA.NS"), ("deep", "BBB.NS")), state, now=1000, cooldown=100)
+    assert list(sent["ticker"]) == ["AAA.NS", "BBB.NS"]
+    # Still matching inside the cooldown: quiet
+    sent, state = dedupe(hits(("deep", "AAA.NS"), ("deep", "BBB.NS")), state, now=1050, cooldown=100)
+    assert sent.empty
+    # BBB clears, then matches again: re-armed straight away; AAA fires again after the cooldown
+    sent, state = dedupe(hits(("deep", "AAA.NS")), state, now=1060, cooldown=100)
+    assert sent.empty and "deep|BBB.NS" not in state
+    sent, state = dedupe(hits(("deep", "AAA.NS"), ("deep", "BBB.NS")), state, now=1101, cooldown=100)
+    assert list(sent["ticker"]) == ["AAA.NS", "BBB.NS"]
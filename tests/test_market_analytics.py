@@ -0,0 +1,41 @@
+# Window matrix vs a straightforward per-ticker loop, on LocalProvider's deterministic
+# synthetic bars (no network).
+import pytest
+
+from libraries import market_data
+from libraries.market_analytics import compute_window_matrix
+
+TICKERS = ["AAA.NS", "BBB.NS", "CCC.NS", "DDD.NS"]
+WINDOWS = {"1W": 6, "4W": 23, "6M": 127, "1Y": 253}
+
+@pytest.fixture(scope="module")
+def histories():
+    bars = market_data.LocalProvider(seed=7).fetch(TICKERS, period="2y")
+    # One young listing, shorter than the longest window, to exercise the NaN padding
+    bars["DDD.NS"] = bars["DDD.NS"].tail(40)
+    return bars
+
+def naive_window(df, days):
+    closes = df["Close"].tail(days).to_numpy(dtype=float)
+    curr, high, low = closes[-1], closes.max(), closes.min()
+    peak, max_dd = closes[0], 0.0
+    for c in closes:
+        peak = max(peak, c)
+        max_dd = min(max_dd, c / peak - 1)
+    std = closes.std()
+    return {
+        "curr": curr, "high": high, "low": low,
+        "return": (curr - closes[0]) / closes[0] * 100,
+        "drawdown": (curr - high) / high * 100,
+        "max_drawdown": max_dd * 100,
+        "zscore": (curr - closes.mean()) / std if std > 0 else 0.0,
+    }
+
+def test_window_matrix_matches_naive(histories):
+    matrix = compute_window_matrix(histories, WINDOWS)
+    assert sorted(matrix.index) == sorted(TICKERS)
+    for ticker, df in histories.items():
+        for label, days in WINDOWS.items():
+            expected = naive_window(df, days)
+            for metric, value in expected.items():
+                assert matrix.loc[ticker, (label, metric)] == pytest.approx(value, rel=1e-9, abs=1e-9), (ticker, label, metric)
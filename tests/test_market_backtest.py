@@ -0,0 +1,45 @@
+# Vectorized backtester vs a straightforward day-by-day loop, on LocalProvider's
+# deterministic synthetic bars (no network).
+import pytest
+
+from libraries import market_data
+from libraries.market_analytics import wide_closes
+from libraries.market_backtest import TRADING_DAYS, backtest_grid, buy_and_hold
+
+@pytest.fixture(scope="module")
+def histories():
+    return market_data.LocalProvider(seed=7).fetch(["AAA.NS", "BBB.NS"], period="2y")
+
+def naive_max_drawdown(values):
+    peak, worst = values[0], 0.0
+    for v in values:
+        peak = max(peak, v)
+        worst = min(worst, v / peak - 1)
+    return worst * 100
+
+def naive_backtest(closes, threshold, lookback, hold):
+    values = closes.to_numpy(dtype=float)
+    equity, held_until, trades = 1.0, -1, 0
+    for t in range(len(values) - 1):
+        high = values[max(0, t - lookback + 1): t + 1].max()
+        if (values[t] / high - 1) * 100 <= -threshold:
+            if held_until < t: trades += 1
+            held_until = t + hold - 1
+        if held_until >= t: equity *= values[t + 1] / values[t]
+    cagr = (equity ** (TRADING_DAYS / (len(values) - 1)) - 1) * 100
+    return cagr, trades
+
+@pytest.mark.parametrize("threshold,lookback,hold", [(3, 20, 5), (8, 63, 21), (15, 252, 63)])
+def test_backtest_cagr_matches_naive(histories, threshold, lookback, hold):
+    closes = wide_closes({"AAA.NS": histories["AAA.NS"]})
+    result = backtest_grid(closes, thresholds=(threshold,), lookbacks=(lookback,), holds=(hold,)).iloc[0]
+    cagr, _ = naive_backtest(closes["AAA.NS"], threshold, lookback, hold)
+    assert result["cagr"] == pytest.approx(cagr, rel=1e-9, abs=1e-9)
+
+def test_buy_and_hold_matches_naive(histories):
+    closes = wide_closes({"BBB.NS": histories["BBB.NS"]})
+    values = closes["BBB.NS"].to_numpy(dtype=float)
+    bh = buy_and_hold(closes).loc["BBB.NS"]
+    expected = ((values[-1] / values[0]) ** (TRADING_DAYS / (len(values) - 1)) - 1) * 100
+    assert bh["bh_cagr"] == pytest.approx(expected)
+    assert bh["bh_max_drawdown"] == pytest.approx(naive_max_drawdown(values))
@@ -0,0 +1,71 @@
+# Price store and caches on LocalProvider data, in a throwaway store directory.
+import threading
+
+import pandas as pd
+import pytest
+
+from libraries import market_data
+
+TICKERS = ["AAA.NS", "BBB.NS", "CCC.NS"]
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(market_data, "PRICE_STORE_DIR", str(tmp_path))
+    provider = market_data.LocalProvider(seed=3, latency=0.2)
+    monkeypatch.setattr(market_data, "_provider", provider)
+    return provider
+
+def store_lines(ticker):
+    with open(market_data.store_path(ticker)) as f: return f.readlines()
+
+def test_update_store_appends_only_new_bars(provider):
+    full = market_data.update_store(["AAA.NS"])["AAA.NS"]
+    # Pretend the file is a week behind and its last bar was taken before the close
+    behind = full.iloc[:-5].copy()
+    behind.iloc[-1, behind.columns.get_loc("Close")] *= 1.01
+    market_data.save_stored("AAA.NS", behind)
+    before = store_lines("AAA.NS")
+    updated = market_data.update_store(["AAA.NS"], max_age=0)["AAA.NS"]
+    after = store_lines("AAA.NS")
+    # The old rows are untouched; the moved bar and the five new ones are appended
+    assert after[:len(before)] == before and len(after) == len(before) + 6
+    pd.testing.assert_frame_equal(updated, full, check_freq=False)
+    pd.testing.assert_frame_equal(market_data.load_stored("AAA.NS"), full, check_freq=False)
+
+def test_load_stored_compacts_superseded_rows(provider, monkeypatch):
+    full = market_data.update_store(["AAA.NS"])["AAA.NS"]
+    # Three corrected closes appended over rows the file already has
+    bumped = full.iloc[-3:].copy()
+    bumped["Close"] *= 1.01
+    market_data.append_stored("AAA.NS", full.iloc[:-3], bumped)
+    monkeypatch.setattr(market_data, "STORE_COMPACT_AFTER", 2)
+    reloaded = market_data.load_stored("AAA.NS")
+    assert len(store_lines("AAA.NS")) == len(full) + 1
+    pd.testing.assert_frame_equal(market_data.load_stored("AAA.NS"), reloaded)
+    assert reloaded["Close"].iloc[-1] == pytest.approx(full["Close"].iloc[-1] * 1.01)
+
+def test_waiting_get_waits_for_a_load_already_in_flight(provider):
+    cache = market_data.PriceCache()
+    cache.get(TICKERS, wait=False) # another session starts the load in the background
+    bars, version = cache.get(TICKERS)
+    assert all(bars[t] is not None for t in TICKERS)
+    assert version == 1 and provider.calls == 1
+
+def test_invalidate_reloads_after_an_in_flight_refresh(provider):
+    cache = market_data.PriceCache()
+    cache.get(TICKERS)
+    background = threading.Thread(target=cache.refresh, args=(TICKERS, True))
+    background.start()
+    cache.invalidate(TICKERS)
+    background.join()
+    # Both forced refreshes really ran: one did not just skip the other's tickers
+    assert provider.calls == 3 and cache.version == 3
+
+def test_local_provider_builds_each_series_once():
+    provider = market_data.LocalProvider(seed=3)
+    first = provider.fetch(TICKERS, period="1y")
+    again = provider.fetch(TICKERS, period="1y")
+    assert provider.synthetic_bars("AAA.NS") is provider.synthetic_bars("AAA.NS")
+    # Cached or fresh, same ticker + seed -> same bars
+    fresh = market_data.LocalProvider(seed=3).fetch(TICKERS, period="1y")
+    for t in TICKERS: assert first[t].equals(again[t]) and first[t].equals(fresh[t])
@@ -0,0 +1,45 @@
+# The Dip Hunter page's data path, run through Streamlit's AppTest against LocalProvider.
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from libraries import market_data
+
+def cold_page(store, fail):
+    import streamlit as st
+    from libraries import market_data, market_lib
+    market_data.PRICE_STORE_DIR = store
+    market_data.set_provider(market_data.LocalProvider(seed=1, latency=0.3, fail_tickers=("AAA.NS", "BBB.NS") if fail else ()))
+    matrix, stale = market_lib.get_window_matrix(("AAA.NS", "BBB.NS"))
+    st.session_state.result = (len(matrix), stale)
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(market_data, "PRICE_STORE_DIR", str(tmp_path))
+    yield str(tmp_path)
+    market_data.set_provider(None)
+
+def run_cold_page(store, fail=False):
+    # Fresh process state: no PriceCache and no cached matrix yet
+    from libraries import market_lib
+    market_lib.get_price_cache.clear()
+    market_lib.build_window_matrix.clear()
+    at = AppTest.from_function(cold_page, args=(store, fail), default_timeout=10).run()
+    assert not at.exception
+    return at.session_state["result"]
+
+def test_first_run_without_snapshot_waits_for_prices(store):
+    assert run_cold_page(store) == (2, False)
+    assert os.path.exists(market_data.snapshot_path())
+
+def test_cold_run_serves_the_snapshot(store):
+    run_cold_page(store)
+    # Only the snapshot survives, so the background load has to go upstream (slowly)
+    for name in os.listdir(store):
+        if not name.endswith(".pkl"): os.remove(os.path.join(store, name))
+    assert run_cold_page(store) == (2, True)
+
+def test_empty_matrix_is_never_saved_as_snapshot(store):
+    assert run_cold_page(store, fail=True) == (0, False)
+    assert not os.path.exists(market_data.snapshot_path())